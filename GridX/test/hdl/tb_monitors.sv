@@ -0,0 +1,64 @@
+`default_nettype none
+`timescale 1ns/1ns
+
+// TILE TESTBENCH MONITORS
+// > Counts requester 0's stalled and serviced read cycles on the HDL side, so the
+//   tile tests can sleep through a window and read the totals once at the end
+// > Flags any read that is let through while the target tile is still LOADING
+// > Logs every state tile 0 passes through (up to 7), read back once after a sequence
+module tb_monitors (
+    input wire clk,
+    input wire reset,
+
+    input wire read_valid,          // core_read_valid[0]
+    input wire read_in_tile_0,      // core_read_address[0] falls in tile 0
+    input wire must_stall,          // lsu_must_stall[0]
+    input wire [2:0] tile_0_state,  // tile_state[0]
+
+    output reg [31:0] stall_cnt,    // Cycles a valid read was stalled
+    output reg [31:0] work_cnt,     // Cycles a valid read went through
+
+    output reg [20:0] state_log,    // tile_state[0] history, entry k at bits [3k+2:3k]
+    output reg [2:0] state_log_count  // Entries held in state_log
+);
+    localparam TILE_IDLE    = 3'b000;
+    localparam TILE_LOADING = 3'b001;
+    localparam STATE_LOG_DEPTH = 7;
+
+    always @(posedge clk) begin
+        if (reset) begin
+            stall_cnt <= 0;
+            work_cnt <= 0;
+        end else if (read_valid) begin
+            if (must_stall) begin
+                stall_cnt <= stall_cnt + 1;
+            end else begin
+                work_cnt <= work_cnt + 1;
+            end
+        end
+    end
+
+    // Push tile 0's state each time it differs from the last entry; reset leaves the
+    // log holding IDLE. A change shows up here one edge after it lands.
+    reg [2:0] last_state;
+    always @(posedge clk) begin
+        if (reset) begin
+            state_log <= 0;
+            state_log_count <= 1;
+            last_state <= TILE_IDLE;
+        end else if (tile_0_state != last_state) begin
+            last_state <= tile_0_state;
+            if (state_log_count < STATE_LOG_DEPTH) begin
+                state_log[state_log_count*3 +: 3] <= tile_0_state;
+                state_log_count <= state_log_count + 1;
+            end
+        end
+    end
+
+    // A read into tile 0 while it is LOADING must stall
+    always @(posedge clk) begin
+        if (!reset && read_valid && read_in_tile_0 && tile_0_state == TILE_LOADING && !must_stall) begin
+            $error("ILLEGAL: LSU read let through while tile 0 LOADING");
+        end
+    end
+endmodule
@@ -0,0 +1,146 @@
+`default_nettype none
+`timescale 1ns/1ns
+
+// TILE TESTBENCH TOP
+// > cocotb toplevel for the tile visibility and fence ordering tests
+// > Re-declares the sram_controller ports under their own names, so the tests
+//   drive and sample them exactly as they would on the bare controller
+// > Adds tile_state_packed, every tile state in one vector
+// > Adds core_read_address_0, requester 0's read address as a scalar
+// > Hosts tb_monitors (Icarus has no bind), exposing stall_cnt / work_cnt and
+//   tile 0's state_log / state_log_count
+// > Starts the SRAM region at SRAM_BASE..SRAM_LIMIT and ties off the inputs no tile test uses
+// > Generates clk itself (10ns period, matching CLOCK_PERIOD_NS), so the tests only
+//   await the edges they need instead of producing every one from Python
+module tb_top #(
+    parameter NUM_CORES = 2,
+    parameter THREADS_PER_BLOCK = 4,
+    parameter NUM_BANKS = 8,
+    parameter DATA_WIDTH = 64,
+    parameter ADDR_BITS = 8,
+    parameter NUM_REQUESTERS = NUM_CORES * THREADS_PER_BLOCK,
+    parameter NUM_TILES = 4,
+    parameter SRAM_BASE = 8'h00,          // Reset-time SRAM region; tests may overwrite
+    parameter SRAM_LIMIT = 8'h7F
+);
+    reg clk;
+    reg reset;
+
+    initial clk = 0;
+    always #5 clk = ~clk;
+
+    reg [ADDR_BITS-1:0] sram_base_reg;
+    reg [ADDR_BITS-1:0] sram_limit_reg;
+
+    reg [NUM_REQUESTERS-1:0] core_read_valid;
+    reg [ADDR_BITS-1:0] core_read_address [NUM_REQUESTERS-1:0];
+    wire [NUM_REQUESTERS-1:0] core_read_ready;
+
+    // sv2v flattens core_read_address into one packed bus, which cocotb cannot index.
+    // The tests only read from requester 0 and drive its address through this alias.
+    reg [ADDR_BITS-1:0] core_read_address_0;
+    always @(*) core_read_address[0] = core_read_address_0;
+    wire [DATA_WIDTH-1:0] core_read_data [NUM_REQUESTERS-1:0];
+
+    reg [NUM_REQUESTERS-1:0] core_write_valid;
+    reg [ADDR_BITS-1:0] core_write_address [NUM_REQUESTERS-1:0];
+    reg [DATA_WIDTH-1:0] core_write_data [NUM_REQUESTERS-1:0];
+    wire [NUM_REQUESTERS-1:0] core_write_ready;
+
+    wire [NUM_REQUESTERS-1:0] core_bank_conflict;
+
+    reg tile_ld_valid;
+    reg [$clog2(NUM_TILES)-1:0] tile_ld_id;
+    reg tile_st_valid;
+    reg [$clog2(NUM_TILES)-1:0] tile_st_id;
+    reg tile_fence_valid;
+    reg [$clog2(NUM_TILES)-1:0] tile_fence_id;
+    wire tile_fence_done;
+
+    wire [NUM_REQUESTERS-1:0] lsu_must_stall;
+
+    wire [NUM_REQUESTERS-1:0] ext_read_valid;
+    wire [ADDR_BITS-1:0] ext_read_address [NUM_REQUESTERS-1:0];
+    reg [NUM_REQUESTERS-1:0] ext_read_ready;
+    reg [DATA_WIDTH-1:0] ext_read_data [NUM_REQUESTERS-1:0];
+
+    wire [NUM_REQUESTERS-1:0] ext_write_valid;
+    wire [ADDR_BITS-1:0] ext_write_address [NUM_REQUESTERS-1:0];
+    wire [DATA_WIDTH-1:0] ext_write_data [NUM_REQUESTERS-1:0];
+    reg [NUM_REQUESTERS-1:0] ext_write_ready;
+
+    reg dma_read_valid;
+    reg [ADDR_BITS-1:0] dma_read_address;
+    wire dma_read_ready;
+    wire [DATA_WIDTH-1:0] dma_read_data;
+    reg dma_write_valid;
+    reg [ADDR_BITS-1:0] dma_write_address;
+    reg [DATA_WIDTH-1:0] dma_write_data;
+    wire dma_write_ready;
+    reg dma_write_done;
+    reg dma_read_done;
+
+    reg [NUM_BANKS-1:0] force_bank_enable;
+    reg [NUM_BANKS-1:0] force_bank_sleep;
+
+    wire [NUM_BANKS-1:0] bank_active;
+    wire [1:0] bank_power_state [NUM_BANKS-1:0];
+    wire [NUM_BANKS-1:0] bank_needs_reload;
+    wire [2:0] tile_state [NUM_TILES-1:0];
+
+    // Every tile's state in one vector (tile t at bits [3t+2:3t]), read with a single access
+    wire [NUM_TILES*3-1:0] tile_state_packed;
+    genvar t;
+    generate
+        for (t = 0; t < NUM_TILES; t = t + 1) begin : pack_tile_state
+            assign tile_state_packed[t*3 +: 3] = tile_state[t];
+        end
+    endgenerate
+
+    wire [31:0] stall_cnt;
+    wire [31:0] work_cnt;
+    wire [20:0] state_log;
+    wire [2:0] state_log_count;
+
+    // The tile tests only exercise core reads and the tile commands. Hold the write,
+    // external-memory and DMA request inputs idle (and leave bank power unforced) so
+    // those paths stay quiet instead of carrying X every cycle. Tests may still drive them.
+    initial begin
+        sram_base_reg = SRAM_BASE;
+        sram_limit_reg = SRAM_LIMIT;
+        core_write_valid = 0;
+        ext_read_ready = 0;
+        ext_write_ready = 0;
+        dma_read_valid = 0;
+        dma_write_valid = 0;
+        force_bank_enable = 0;
+        force_bank_sleep = 0;
+    end
+
+    sram_controller #(
+        .NUM_CORES(NUM_CORES),
+        .THREADS_PER_BLOCK(THREADS_PER_BLOCK),
+        .NUM_BANKS(NUM_BANKS),
+        .DATA_WIDTH(DATA_WIDTH),
+        .ADDR_BITS(ADDR_BITS),
+        .NUM_TILES(NUM_TILES)
+    ) controller (.*);
+
+    // Tile 0 spans the first quarter of the SRAM region (see get_tile_id)
+    wire [ADDR_BITS-1:0] tile_size = (sram_limit_reg - sram_base_reg + 1) / NUM_TILES;
+    wire read_in_tile_0 = core_read_address_0 >= sram_base_reg &&
+                          core_read_address_0 - sram_base_reg < tile_size;
+
+    tb_monitors monitors (
+        .clk(clk),
+        .reset(reset),
+        .read_valid(core_read_valid[0]),
+        .read_in_tile_0(read_in_tile_0),
+        .must_stall(lsu_must_stall[0]),
+        .tile_0_state(tile_state[0]),
+        .stall_cnt(stall_cnt),
+        .work_cnt(work_cnt),
+        .state_log(state_log),
+        .state_log_count(state_log_count)
+    );
+endmodule
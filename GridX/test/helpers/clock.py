@@ -0,0 +1,16 @@
+import cocotb
+from cocotb.clock import Clock
+from .utils_compat import CLOCK_PERIOD_NS, CLOCK_UNIT
+
+# Clock task shared by every test in this simulator run
+_clock_handle = None
+
+
+def start_clock(dut):
+    """Start the dut.clk clock unless it is already running, and return its task.
+    Tests in one run share the task. If the scheduler has ended it (for example at
+    the end of the previous test), a new one is started."""
+    global _clock_handle
+    if _clock_handle is None or _clock_handle.done():
+        _clock_handle = cocotb.start_soon(Clock(dut.clk, CLOCK_PERIOD_NS, units=CLOCK_UNIT).start())
+    return _clock_handle
@@ -1,169 +1,190 @@
 from typing import List, Optional
 from .logger import logger
-from .utils_compat import sig_to_int, sig_to_str
+from .utils_compat import sig_to_int, sig_to_str, has_xz
+
+# Register names indexed by register number (R0-R12 general purpose, R13-R15 special)
+_REG_NAMES = tuple(f"R{i}" for i in range(13)) + ("%blockIdx", "%blockDim", "%threadIdx")
+
+# Operand fields decoded by format_instruction
+_FIELD_RD = 1 << 0
+_FIELD_RS = 1 << 1
+_FIELD_RT = 1 << 2
+_FIELD_NZP = 1 << 3
+_FIELD_IMM = 1 << 4
+
+# Opcode -> (template, operand fields used by the template)
+_OPCODE_TABLE = {
+    0b0000: ("NOP", 0),
+    0b0001: ("BRnzp {nzp}, {imm}", _FIELD_NZP | _FIELD_IMM),
+    0b0010: ("CMP {rs}, {rt}", _FIELD_RS | _FIELD_RT),
+    0b0011: ("ADD {rd}, {rs}, {rt}", _FIELD_RD | _FIELD_RS | _FIELD_RT),
+    0b0100: ("SUB {rd}, {rs}, {rt}", _FIELD_RD | _FIELD_RS | _FIELD_RT),
+    0b0101: ("MUL {rd}, {rs}, {rt}", _FIELD_RD | _FIELD_RS | _FIELD_RT),
+    0b0110: ("DIV {rd}, {rs}, {rt}", _FIELD_RD | _FIELD_RS | _FIELD_RT),
+    0b0111: ("LDR {rd}, {rs}", _FIELD_RD | _FIELD_RS),
+    0b1000: ("STR {rs}, {rt}", _FIELD_RS | _FIELD_RT),
+    0b1001: ("CONST {rd}, {imm}", _FIELD_RD | _FIELD_IMM),
+    0b1010: ("TILE_LD {rd}, {rs}", _FIELD_RD | _FIELD_RS),
+    0b1011: ("TILE_ST {rs}, {rt}", _FIELD_RS | _FIELD_RT),
+    0b1100: ("DMA_SYNC", 0),
+    0b1101: ("TILE_FENCE", 0),
+    0b1111: ("RET", 0),
+}
 
 def format_register(register: int) -> str:
-    if register < 13:
-        return f"R{register}"
-    if register == 13:
-        return f"%blockIdx"
-    if register == 14:
-        return f"%blockDim"
-    if register == 15:
-        return f"%threadIdx"
+    if 0 <= register < len(_REG_NAMES):
+        return _REG_NAMES[register]
     return f"R{register}"
     
 def format_instruction(instruction: str) -> str:
     # Handle X/Z values
-    if 'x' in instruction.lower() or 'z' in instruction.lower():
+    if has_xz(instruction):
         return "UNKNOWN (X/Z)"
-    
-    opcode = instruction[0:4]
-    rd = format_register(int(instruction[4:8], 2))
-    rs = format_register(int(instruction[8:12], 2))
-    rt = format_register(int(instruction[12:16], 2))
-    n = "N" if instruction[4] == '1' else ""
-    z = "Z" if instruction[5] == '1' else ""
-    p = "P" if instruction[6] == '1' else ""
-    imm = f"#{int(instruction[8:16], 2)}"
-
-    if opcode == "0000":
-        return "NOP"
-    elif opcode == "0001":
-        return f"BRnzp {n}{z}{p}, {imm}"
-    elif opcode == "0010":
-        return f"CMP {rs}, {rt}"
-    elif opcode == "0011":
-        return f"ADD {rd}, {rs}, {rt}"
-    elif opcode == "0100":
-        return f"SUB {rd}, {rs}, {rt}"
-    elif opcode == "0101":
-        return f"MUL {rd}, {rs}, {rt}"
-    elif opcode == "0110":
-        return f"DIV {rd}, {rs}, {rt}"
-    elif opcode == "0111":
-        return f"LDR {rd}, {rs}"
-    elif opcode == "1000":
-        return f"STR {rs}, {rt}"
-    elif opcode == "1001":
-        return f"CONST {rd}, {imm}"
-    elif opcode == "1010":
-        return f"TILE_LD {rd}, {rs}"
-    elif opcode == "1011":
-        return f"TILE_ST {rs}, {rt}"
-    elif opcode == "1100":
-        return "DMA_SYNC"
-    elif opcode == "1101":
-        return "TILE_FENCE"
-    elif opcode == "1111":
-        return "RET"
+
+    # Parse once, then pull out only the fields the opcode actually uses
+    word = int(instruction, 2)
+    entry = _OPCODE_TABLE.get((word >> 12) & 0xF)
+    if entry is None:
+        return "UNKNOWN"
+
+    template, fields = entry
+    if not fields:
+        return template
+
+    operands = {}
+    if fields & _FIELD_RD:
+        operands["rd"] = _REG_NAMES[(word >> 8) & 0xF]
+    if fields & _FIELD_RS:
+        operands["rs"] = _REG_NAMES[(word >> 4) & 0xF]
+    if fields & _FIELD_RT:
+        operands["rt"] = _REG_NAMES[word & 0xF]
+    if fields & _FIELD_NZP:
+        operands["nzp"] = ("N" if word & 0x800 else "") + ("Z" if word & 0x400 else "") + ("P" if word & 0x200 else "")
+    if fields & _FIELD_IMM:
+        operands["imm"] = f"#{word & 0xFF}"
+    return template.format(**operands)
+
+# State names indexed by the state register's integer encoding
+_CORE_STATES = ("IDLE", "FETCH", "DECODE", "REQUEST", "WAIT", "EXECUTE", "UPDATE", "DONE")
+_FETCHER_STATES = ("IDLE", "FETCHING", "FETCHED")
+_LSU_STATES = ("IDLE", "REQUESTING", "WAITING", "DONE")
+_MEMORY_CONTROLLER_STATES = ("IDLE", "READING", "WRITING")
+
+def format_core_state(core_state: int) -> str:
+    if 0 <= core_state < len(_CORE_STATES):
+        return _CORE_STATES[core_state]
+    return "UNKNOWN"
+
+def format_fetcher_state(fetcher_state: int) -> str:
+    if 0 <= fetcher_state < len(_FETCHER_STATES):
+        return _FETCHER_STATES[fetcher_state]
     return "UNKNOWN"
 
-def format_core_state(core_state: str) -> str:
-    core_state_map = {
-        "000": "IDLE",
-        "001": "FETCH",
-        "010": "DECODE",
-        "011": "REQUEST",
-        "100": "WAIT",
-        "101": "EXECUTE",
-        "110": "UPDATE",
-        "111": "DONE"
-    }
-    return core_state_map.get(core_state, "UNKNOWN")
-
-def format_fetcher_state(fetcher_state: str) -> str:
-    fetcher_state_map = {
-        "000": "IDLE",
-        "001": "FETCHING",
-        "010": "FETCHED"
-    }
-    return fetcher_state_map.get(fetcher_state, "UNKNOWN")
-
-def format_lsu_state(lsu_state: str) -> str:
-    lsu_state_map = {
-        "00": "IDLE",
-        "01": "REQUESTING",
-        "10": "WAITING",
-        "11": "DONE"
-    }
-    return lsu_state_map.get(lsu_state, "UNKNOWN")
-
-def format_memory_controller_state(controller_state: str) -> str:
-    controller_state_map = {
-        "000": "IDLE",
-        "001": "READING",
-        "010": "WRITING"
-    }
-    return controller_state_map.get(controller_state, "UNKNOWN")
+def format_lsu_state(lsu_state: int) -> str:
+    if 0 <= lsu_state < len(_LSU_STATES):
+        return _LSU_STATES[lsu_state]
+    return "UNKNOWN"
+
+def format_memory_controller_state(controller_state: int) -> str:
+    if 0 <= controller_state < len(_MEMORY_CONTROLLER_STATES):
+        return _MEMORY_CONTROLLER_STATES[controller_state]
+    return "UNKNOWN"
 
 def format_registers(registers: List[str]) -> str:
+    # registers[i] holds register 15 - i; walk it backwards so R0 comes first
     formatted_registers = []
-    for i, reg_value in enumerate(registers):
-        if 'x' in reg_value.lower() or 'z' in reg_value.lower():
+    for i in range(len(registers) - 1, -1, -1):
+        reg_value = registers[i]
+        if has_xz(reg_value):
             decimal_value = 0
         else:
             decimal_value = int(reg_value, 2)
-        reg_idx = 15 - i
-        formatted_registers.append(f"{format_register(reg_idx)} = {decimal_value}")
-    formatted_registers.reverse()
+        formatted_registers.append(f"{format_register(15 - i)} = {decimal_value}")
     return ', '.join(formatted_registers)
 
+def can_format(dut) -> bool:
+    """Check once that dut exposes the hierarchy format_cycle walks.
+
+    The hierarchy is fixed for a test, so callers probe it before tracing and skip
+    the per-cycle dump for that test when it is missing."""
+    try:
+        dut.thread_count
+        dut.THREADS_PER_BLOCK
+        core_instance = next(iter(dut.cores)).core_instance
+        thread = next(iter(core_instance.threads))
+        thread.register_instance
+        thread.lsu_instance
+        thread.alu_instance
+    except (AttributeError, IndexError, TypeError, StopIteration) as e:
+        logger.debug(f"Format disabled, signal not found: {e}")
+        return False
+    return True
+
 def format_cycle(dut, cycle_id: int, thread_id: Optional[int] = None):
     """Format cycle information - cocotb 2.0 compatible"""
+    if not logger.is_enabled("debug"):
+        return
+
     logger.debug(f"\n================================== Cycle {cycle_id} ==================================")
 
     try:
+        # Kernel-wide values are the same for every core
+        thread_count_val = sig_to_int(dut.thread_count)
+        threads_per_block = sig_to_int(dut.THREADS_PER_BLOCK)
+
         for core in dut.cores:
             # Use sig_to_int for all signal comparisons
-            thread_count_val = sig_to_int(dut.thread_count)
             core_idx = sig_to_int(core.i)
-            threads_per_block = sig_to_int(dut.THREADS_PER_BLOCK)
             
             if threads_per_block > 0 and thread_count_val <= core_idx * threads_per_block:
                 continue
 
             logger.debug(f"\n+--------------------- Core {core_idx} ---------------------+")
 
-            instruction = sig_to_str(core.core_instance.instruction)
+            core_instance = core.core_instance
+            instruction = sig_to_str(core_instance.instruction)
+            core_thread_count = sig_to_int(core_instance.thread_count)
+            block_idx = sig_to_int(core_instance.block_id)
+            block_dim = sig_to_int(core_instance.THREADS_PER_BLOCK)
+            reg_input_mux = sig_to_int(core_instance.decoded_reg_input_mux)
+            constant = sig_to_int(core_instance.decoded_immediate)
+            core_state = format_core_state(sig_to_int(core_instance.core_state))
+            fetcher_state = format_fetcher_state(sig_to_int(core_instance.fetcher_state))
             
-            for thread in core.core_instance.threads:
+            for thread in core_instance.threads:
                 thread_i = sig_to_int(thread.i)
-                core_thread_count = sig_to_int(core.core_instance.thread_count)
                 
                 if thread_i < core_thread_count:
-                    block_idx = sig_to_int(core.core_instance.block_id)
-                    block_dim = sig_to_int(core.core_instance.THREADS_PER_BLOCK)
-                    thread_idx = sig_to_int(thread.register_instance.THREAD_ID)
+                    register_instance = thread.register_instance
+                    thread_idx = sig_to_int(register_instance.THREAD_ID)
                     idx = block_idx * block_dim + thread_idx
 
-                    rs = sig_to_int(thread.register_instance.rs)
-                    rt = sig_to_int(thread.register_instance.rt)
-
-                    reg_input_mux = sig_to_int(core.core_instance.decoded_reg_input_mux)
-                    alu_out = sig_to_int(thread.alu_instance.alu_out)
-                    lsu_out = sig_to_int(thread.lsu_instance.lsu_out)
-                    constant = sig_to_int(core.core_instance.decoded_immediate)
-
                     if thread_id is None or thread_id == idx:
-                        logger.debug(f"\n+-------- Thread {idx} --------+")
-
-                        logger.debug("PC:", sig_to_int(core.core_instance.current_pc))
-                        logger.debug("Instruction:", format_instruction(instruction))
-                        logger.debug("Core State:", format_core_state(sig_to_str(core.core_instance.core_state)))
-                        logger.debug("Fetcher State:", format_fetcher_state(sig_to_str(core.core_instance.fetcher_state)))
-                        logger.debug("LSU State:", format_lsu_state(sig_to_str(thread.lsu_instance.lsu_state)))
-                        logger.debug("Registers:", format_registers([sig_to_str(item) for item in thread.register_instance.registers]))
-                        logger.debug(f"RS = {rs}, RT = {rt}")
+                        rs = sig_to_int(register_instance.rs)
+                        rt = sig_to_int(register_instance.rt)
+
+                        # One logger call per thread: each call appends to the log file
+                        lines = [
+                            f"\n+-------- Thread {idx} --------+",
+                            f"PC: {sig_to_int(core_instance.current_pc)}",
+                            f"Instruction: {format_instruction(instruction)}",
+                            f"Core State: {core_state}",
+                            f"Fetcher State: {fetcher_state}",
+                            f"LSU State: {format_lsu_state(sig_to_int(thread.lsu_instance.lsu_state))}",
+                            f"Registers: {format_registers([sig_to_str(item) for item in register_instance.registers])}",
+                            f"RS = {rs}, RT = {rt}",
+                        ]
 
                         if reg_input_mux == 0:
-                            logger.debug("ALU Out:", alu_out)
+                            lines.append(f"ALU Out: {sig_to_int(thread.alu_instance.alu_out)}")
                         if reg_input_mux == 1:
-                            logger.debug("LSU Out:", lsu_out)
+                            lines.append(f"LSU Out: {sig_to_int(thread.lsu_instance.lsu_out)}")
                         if reg_input_mux == 2:
-                            logger.debug("Constant:", constant)
+                            lines.append(f"Constant: {constant}")
+
+                        logger.debug("\n".join(lines))
 
-            logger.debug("Core Done:", sig_to_str(core.core_instance.done))
+            logger.debug("Core Done:", sig_to_str(core_instance.done))
     except Exception as e:
         # Gracefully handle missing signals during format
         logger.debug(f"Format error (may be normal during early cycles): {e}")
\ No newline at end of file
@@ -1,10 +1,16 @@
 import datetime
+import os
 
 class Logger:
     def __init__(self, level="debug"):
         self.filename = f"test/logs/log_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.txt"
         self.level = level
 
+    def is_enabled(self, level):
+        if level == "debug":
+            return self.level == "debug"
+        return True
+
     def debug(self, *messages):
         if self.level == "debug":
             self.info(*messages)
@@ -14,4 +20,7 @@ class Logger:
         with open(self.filename, "a") as log_file:
             log_file.write(full_message + "\n")
 
-logger = Logger(level="debug")
\ No newline at end of file
+# The default level is info. Per-cycle trace output (format_cycle) is debug-only, so it
+# is off unless COCOTB_LOG_LEVEL=DEBUG. Only debug is filtered: any other level, including
+# WARNING or ERROR, still writes info-level entries to the trace file.
+logger = Logger(level=os.environ.get("COCOTB_LOG_LEVEL", "info").lower())
\ No newline at end of file
@@ -1,6 +1,29 @@
-from typing import List
+import io
+from array import array
+from typing import Iterable
+from cocotb.triggers import First, RisingEdge
 from .logger import logger
-from .utils_compat import sig_to_str, sig_slice_to_int
+from .utils_compat import has_xz
+
+# Address spaces larger than this are backed by a sparse dict instead of a packed array
+SPARSE_THRESHOLD = 1 << 16
+
+
+class _SparseRows(dict):
+    """Sparse memory rows. Unwritten addresses read as 0 without being stored."""
+
+    def __missing__(self, address):
+        return 0
+
+
+def _dense_rows(size, data_bits):
+    """Zeroed contiguous rows using the narrowest array typecode that holds data_bits."""
+    for typecode in "BHILQ":
+        itemsize = array(typecode).itemsize
+        if itemsize * 8 >= data_bits:
+            return array(typecode, bytes(itemsize * size))
+    return [0] * size
+
 
 class Memory:
     """Memory simulation for cocotb tests. Supports variable channel counts."""
@@ -9,10 +32,34 @@ class Memory:
         self.dut = dut
         self.addr_bits = addr_bits
         self.data_bits = data_bits
-        self.memory = [0] * (2**addr_bits)
+        self.size = 2**addr_bits
+        self._data_mask = (1 << data_bits) - 1
+        self.memory = _SparseRows() if self.size > SPARSE_THRESHOLD else _dense_rows(self.size, data_bits)
         self.channels = channels
         self.name = name
 
+        # Precomputed (start, end) bounds of each channel's field in the
+        # MSB-first binary string of a flattened bus
+        self._addr_slices = self._channel_slices(addr_bits)
+        self._data_slices = self._channel_slices(data_bits)
+        # Matching right-shift of each channel's field in the bus as an integer
+        self._addr_shifts = self._channel_shifts(addr_bits)
+        self._data_shifts = self._channel_shifts(data_bits)
+        self._addr_mask = (1 << addr_bits) - 1
+        # Maps each channel's bit in a valid bus to the channel index
+        self._valid_channels = {1 << shift: i for i, shift in enumerate(self._channel_shifts(1))}
+        # Valid bits for the modelled channels; the DUT may expose more channels than the
+        # model covers, and requests on those are ignored
+        self._channel_mask = (1 << channels) - 1
+
+        # Per-channel decode buffers, reused by every run() call
+        self._read_address = [0] * channels
+        self._write_address = [0] * channels
+        self._write_data = [0] * channels
+
+        # Set once run() has driven both ready buses to 0 and nothing has been served since
+        self._ready_low = False
+
         # Get signal handles - support for scaled GPU with more channels
         self.mem_read_valid = getattr(dut, f"{name}_mem_read_valid")
         self.mem_read_address = getattr(dut, f"{name}_mem_read_address")
@@ -25,87 +72,152 @@ class Memory:
             self.mem_write_data = getattr(dut, f"{name}_mem_write_data")
             self.mem_write_ready = getattr(dut, f"{name}_mem_write_ready")
 
+    def _channel_slices(self, bits):
+        return tuple((i * bits, (i + 1) * bits) for i in range(self.channels))
+
+    def _channel_shifts(self, bits):
+        return tuple((self.channels - 1 - i) * bits for i in range(self.channels))
+
+    @staticmethod
+    def _read_valid(signal):
+        value = signal.value
+        try:
+            return int(value)
+        except ValueError:
+            # Only lines driven to 1 are requests; X/Z lines are ignored
+            return int("".join('1' if c == '1' else '0' for c in str(value)), 2)
+
+    @staticmethod
+    def _read_fields(signal, slices, shifts, mask, fields):
+        # Decode into the caller's preallocated list rather than building a new one
+        value = signal.value
+        try:
+            bus = int(value)
+        except ValueError:
+            # Unresolved bus: decode per channel so only the X/Z fields read as 0
+            bus_str = str(value)
+            for i, (start, end) in enumerate(slices):
+                field = bus_str[start:end]
+                fields[i] = 0 if has_xz(field) else int(field, 2)
+            return fields
+        for i, shift in enumerate(shifts):
+            fields[i] = (bus >> shift) & mask
+        return fields
+
     def run(self):
-        # Use cocotb 2.0 compatible signal access
-        valid_str = sig_to_str(self.mem_read_valid)
-        mem_read_valid = [
-            int(valid_str[i:i+1], 2) if valid_str[i:i+1] in '01' else 0
-            for i in range(0, len(valid_str), 1)
-        ]
-
-        addr_str = sig_to_str(self.mem_read_address)
-        mem_read_address = [
-            int(addr_str[i:i+self.addr_bits], 2) if ('x' not in addr_str[i:i+self.addr_bits].lower() and 'z' not in addr_str[i:i+self.addr_bits].lower()) else 0
-            for i in range(0, len(addr_str), self.addr_bits)
-        ]
-        mem_read_ready = [0] * self.channels
-        mem_read_data = [0] * self.channels
-
-        for i in range(self.channels):
-            if mem_read_valid[i] == 1:
-                mem_read_data[i] = self.memory[mem_read_address[i]]
-                mem_read_ready[i] = 1
-            else:
-                mem_read_ready[i] = 0
+        # Returns False on an idle cycle (no request on either side), True otherwise.
+        # Read the buses as integers; strings are only built when a bus holds X/Z
+        read_valid = self._read_valid(self.mem_read_valid) & self._channel_mask
+        write_valid = self._read_valid(self.mem_write_valid) & self._channel_mask if self.name != "program" else 0
 
-        self.mem_read_data.value = int(''.join(format(d, '0' + str(self.data_bits) + 'b') for d in mem_read_data), 2)
-        self.mem_read_ready.value = int(''.join(format(r, '01b') for r in mem_read_ready), 2)
+        # Idle cycle: nothing to decode. The ready lines only need dropping once,
+        # so a run of idle cycles costs just the two valid reads.
+        if not read_valid and not write_valid:
+            if not self._ready_low:
+                self.mem_read_ready.value = 0
+                if self.name != "program":
+                    self.mem_write_ready.value = 0
+                self._ready_low = True
+            return False
+        self._ready_low = False
+
+        mem_read_address = self._read_fields(
+            self.mem_read_address, self._addr_slices, self._addr_shifts, self._addr_mask, self._read_address
+        )
+
+        # Only channels with a request are visited, MSB (channel 0) first as before.
+        # Every valid channel is served this cycle, so ready mirrors valid.
+        read_data = 0
+        pending = read_valid
+        while pending:
+            bit = 1 << (pending.bit_length() - 1)
+            pending ^= bit
+            i = self._valid_channels[bit]
+            read_data |= (self.memory[mem_read_address[i]] & self._data_mask) << self._data_shifts[i]
+
+        self.mem_read_data.value = read_data
+        self.mem_read_ready.value = read_valid
 
         if self.name != "program":
-            write_valid_str = sig_to_str(self.mem_write_valid)
-            mem_write_valid = [
-                int(write_valid_str[i:i+1], 2) if write_valid_str[i:i+1] in '01' else 0
-                for i in range(0, len(write_valid_str), 1)
-            ]
-            
-            write_addr_str = sig_to_str(self.mem_write_address)
-            mem_write_address = [
-                int(write_addr_str[i:i+self.addr_bits], 2) if ('x' not in write_addr_str[i:i+self.addr_bits].lower() and 'z' not in write_addr_str[i:i+self.addr_bits].lower()) else 0
-                for i in range(0, len(write_addr_str), self.addr_bits)
-            ]
-            
-            write_data_str = sig_to_str(self.mem_write_data)
-            mem_write_data = [
-                int(write_data_str[i:i+self.data_bits], 2) if ('x' not in write_data_str[i:i+self.data_bits].lower() and 'z' not in write_data_str[i:i+self.data_bits].lower()) else 0
-                for i in range(0, len(write_data_str), self.data_bits)
-            ]
-            mem_write_ready = [0] * self.channels
-
-            for i in range(self.channels):
-                if mem_write_valid[i] == 1:
-                    self.memory[mem_write_address[i]] = mem_write_data[i]
-                    mem_write_ready[i] = 1
-                else:
-                    mem_write_ready[i] = 0
-
-            self.mem_write_ready.value = int(''.join(format(w, '01b') for w in mem_write_ready), 2)
+            mem_write_address = self._read_fields(
+                self.mem_write_address, self._addr_slices, self._addr_shifts, self._addr_mask, self._write_address
+            )
+            mem_write_data = self._read_fields(
+                self.mem_write_data, self._data_slices, self._data_shifts, self._data_mask, self._write_data
+            )
+
+            # Same channel order as the read side, so overlapping writes resolve as before
+            pending = write_valid
+            while pending:
+                bit = 1 << (pending.bit_length() - 1)
+                pending ^= bit
+                i = self._valid_channels[bit]
+                self.memory[mem_write_address[i]] = mem_write_data[i]
+
+            self.mem_write_ready.value = write_valid
+
+        return True
 
     def write(self, address, data):
-        if address < len(self.memory):
-            self.memory[address] = data
+        if address < self.size:
+            self.memory[address] = data & self._data_mask
+
+    def load(self, rows: Iterable[int]):
+        # A packed array that matches the backing store exactly is copied in one slice assignment
+        if (
+            isinstance(rows, array)
+            and isinstance(self.memory, array)
+            and rows.typecode == self.memory.typecode
+            and self.memory.itemsize * 8 == self.data_bits
+            and len(rows) <= self.size
+        ):
+            self.memory[:len(rows)] = rows
+            return
 
-    def load(self, rows: List[int]):
         for address, data in enumerate(rows):
             self.write(address, data)
 
     def display(self, rows, decimal=True):
-        logger.info("\n")
-        logger.info(f"{self.name.upper()} MEMORY")
-        
+        # Build the whole table first; each logger call appends to the log file
         table_size = (8 * 2) + 3
-        logger.info("+" + "-" * (table_size - 3) + "+")
-
+        border = "+" + "-" * (table_size - 3) + "+"
         header = "| Addr | Data "
-        logger.info(header + " " * (table_size - len(header) - 1) + "|")
-
-        logger.info("+" + "-" * (table_size - 3) + "+")
-        for i, data in enumerate(self.memory):
-            if i < rows:
-                if decimal:
-                    row = f"| {i:<4} | {data:<4}"
-                    logger.info(row + " " * (table_size - len(row) - 1) + "|")
-                else:
-                    data_bin = format(data, f'0{16}b')
-                    row = f"| {i:<4} | {data_bin} |"
-                    logger.info(row + " " * (table_size - len(row) - 1) + "|")
-        logger.info("+" + "-" * (table_size - 3) + "+")
\ No newline at end of file
+
+        buf = io.StringIO()
+        buf.write("\n\n")
+        buf.write(f"{self.name.upper()} MEMORY\n")
+        buf.write(border + "\n")
+        buf.write(header + " " * (table_size - len(header) - 1) + "|\n")
+        buf.write(border + "\n")
+        for i in range(min(rows, self.size)):
+            data = self.memory[i]
+            if decimal:
+                row = f"| {i:<4} | {data:<4}"
+            else:
+                data_bin = format(data, f'0{16}b')
+                row = f"| {i:<4} | {data_bin} |"
+            buf.write(row + " " * (table_size - len(row) - 1) + "|\n")
+        buf.write(border)
+        logger.info(buf.getvalue())
+
+
+async def service(clk, *memories: Memory):
+    """Run every memory model once per rising edge of clk until the task is cancelled.
+    Start with cocotb.start_soon so the test body only has to watch for completion.
+
+    While every model is idle the task sleeps on a change of any valid bus rather than
+    waking each edge. A request raised at edge k is still served at edge k+1, as when
+    polling."""
+    valid_buses = []
+    for memory in memories:
+        valid_buses.append(memory.mem_read_valid)
+        if memory.name != "program":
+            valid_buses.append(memory.mem_write_valid)
+
+    while True:
+        busy = False
+        for memory in memories:
+            busy |= memory.run()
+        if not busy:
+            await First(*(bus.value_change for bus in valid_buses))
+        await RisingEdge(clk)
\ No newline at end of file
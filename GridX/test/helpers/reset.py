@@ -0,0 +1,28 @@
+from cocotb.triggers import RisingEdge
+
+
+async def reset_dut(dut):
+    """Hold reset for one rising edge, then release it and let one more edge pass.
+    The clock must already be running."""
+    dut.reset.value = 1
+    await RisingEdge(dut.clk)
+    dut.reset.value = 0
+    await RisingEdge(dut.clk)
+
+
+async def reset_tile_controller(dut, sram_base=None, sram_limit=None):
+    """Reset the tile-state sram_controller with both DMA done strobes low.
+    tb_top already starts the SRAM region at its SRAM_BASE/SRAM_LIMIT parameters
+    (0x00-0x7F), so the region registers are only written when a value is passed.
+    The static inputs are written together with setimmediatevalue; reset is
+    released after one rising edge and one more edge passes."""
+    dut.reset.setimmediatevalue(1)
+    if sram_base is not None:
+        dut.sram_base_reg.setimmediatevalue(sram_base)
+    if sram_limit is not None:
+        dut.sram_limit_reg.setimmediatevalue(sram_limit)
+    dut.dma_write_done.setimmediatevalue(0)
+    dut.dma_read_done.setimmediatevalue(0)
+    await RisingEdge(dut.clk)
+    dut.reset.value = 0
+    await RisingEdge(dut.clk)
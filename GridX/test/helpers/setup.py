@@ -1,8 +1,7 @@
-from typing import List
-import cocotb
-from cocotb.clock import Clock
+from typing import Iterable, List
 from cocotb.triggers import RisingEdge
 from .memory import Memory
+from .clock import start_clock
 
 # Cocotb 2.0 clock configuration
 CLOCK_PERIOD_NS = 10
@@ -11,14 +10,12 @@ CLOCK_UNIT = "ns"
 async def setup(
     dut, 
     program_memory: Memory, 
-    program: List[int],
+    program: Iterable[int],
     data_memory: Memory,
     data: List[int],
     threads: int
 ):
-    # Setup Clock (10ns period, 1ns/1ps timescale compatible)
-    clock = Clock(dut.clk, CLOCK_PERIOD_NS, units=CLOCK_UNIT)
-    cocotb.start_soon(clock.start())
+    start_clock(dut)
 
     # Reset
     dut.reset.value = 1
@@ -0,0 +1,24 @@
+from .utils_compat import sig_to_int
+
+
+class SignalSnapshot:
+    """Integer values of a fixed set of signals, taken together at one sampling point.
+
+    Handles are resolved once, by name under dut, when the snapshot is built.
+    Packed or sv2v-flattened vectors are sampled whole; callers mask out the
+    field they need. sample() reads every signal exactly once; indexing then
+    returns the stored ints, so checks that share a sampling point never read
+    the same signal twice.
+    """
+
+    def __init__(self, dut, names):
+        self._handles = {name: getattr(dut, name) for name in names}
+        self._values = {}
+
+    def sample(self):
+        """Read every signal once, replacing the previous values. Returns self."""
+        self._values = {name: sig_to_int(handle) for name, handle in self._handles.items()}
+        return self
+
+    def __getitem__(self, name):
+        return self._values[name]
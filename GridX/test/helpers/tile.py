@@ -0,0 +1,97 @@
+from cocotb.triggers import ClockCycles, RisingEdge
+from .utils_compat import sig_to_int
+
+# Tile states matching sram_controller.sv
+TILE_IDLE = 0
+TILE_LOADING = 1
+TILE_READY = 2
+TILE_IN_USE = 3
+TILE_EVICTING = 4
+
+# Width of one tile_state entry (3-bit encoding in sram_controller.sv)
+TILE_STATE_BITS = 3
+
+
+def read_tile_states(dut):
+    """Return every tile's state, indexed by tile id, from one read of tb_top's
+    tile_state_packed. Tile t occupies bits [3t+2:3t]."""
+    packed = dut.tile_state_packed
+    value = sig_to_int(packed)
+    mask = (1 << TILE_STATE_BITS) - 1
+    return [(value >> (t * TILE_STATE_BITS)) & mask for t in range(len(packed) // TILE_STATE_BITS)]
+
+
+def read_state_log(dut):
+    """Return the states tile 0 has passed through since reset, oldest first, as
+    logged by tb_monitors. Read after ReadOnly so the entry for a change on the last
+    edge is included."""
+    log = sig_to_int(dut.state_log)
+    count = sig_to_int(dut.state_log_count)
+    mask = (1 << TILE_STATE_BITS) - 1
+    return [(log >> (k * TILE_STATE_BITS)) & mask for k in range(count)]
+
+
+# Tile ids and read addresses are written with setimmediatevalue: each is only written
+# while its valid strobe is low at the current edge, so the DUT cannot sample it early.
+# The strobes themselves keep deferred .value writes, which land after the edge.
+
+
+async def pulse(clk, signal, cycles=1):
+    """Drive signal high for the given number of rising edges, then low again."""
+    signal.value = 1
+    await ClockCycles(clk, cycles)
+    signal.value = 0
+
+
+async def drive_to_loading(dut, tid=0):
+    """IDLE -> LOADING: issue TILE_LD for tile tid and let the transition land."""
+    dut.tile_ld_id.setimmediatevalue(tid)
+    await pulse(dut.clk, dut.tile_ld_valid)
+    await RisingEdge(dut.clk)
+
+
+async def drive_to_ready(dut, tid=0):
+    """IDLE -> LOADING -> READY. dma_write_done is raised on the edge after TILE_LD,
+    which is the first edge the tile is LOADING, so the two strobes share no idle edge."""
+    dut.tile_ld_id.setimmediatevalue(tid)
+    await pulse(dut.clk, dut.tile_ld_valid)
+    await pulse(dut.clk, dut.dma_write_done)
+    await RisingEdge(dut.clk)
+
+
+async def drive_to_in_use(dut, tid=0, address=0x10):
+    """IDLE -> ... -> IN_USE through a first read from requester 0 at address, which
+    must fall inside tile tid. The read is left asserted; the caller drops it."""
+    await drive_to_ready(dut, tid)
+    # core_read_valid is packed (bit i = requester i): writing 1 raises requester 0 alone
+    dut.core_read_valid.value = 1
+    dut.core_read_address_0.setimmediatevalue(address)
+    await ClockCycles(dut.clk, 2)
+
+
+async def drive_to_evicting(dut, tid=0):
+    """IDLE -> ... -> READY -> EVICTING via TILE_ST."""
+    await drive_to_ready(dut, tid)
+    dut.tile_st_id.setimmediatevalue(tid)
+    await pulse(dut.clk, dut.tile_st_valid)
+    await RisingEdge(dut.clk)
+
+
+async def _stay_idle(dut, tid=0):
+    """IDLE: reset already left the tile there, so there is nothing to drive."""
+
+
+async def drive_to_state(dut, tid, state):
+    """Drive tile tid from IDLE (just after reset) to the given state with the
+    matching drive_to_* sequence. IN_USE leaves requester 0's read asserted."""
+    await _DRIVERS[state](dut, tid)
+
+
+# Sequence that reaches each state from IDLE, so drive_to_state is one lookup
+_DRIVERS = {
+    TILE_IDLE: _stay_idle,
+    TILE_LOADING: drive_to_loading,
+    TILE_READY: drive_to_ready,
+    TILE_IN_USE: drive_to_in_use,
+    TILE_EVICTING: drive_to_evicting,
+}
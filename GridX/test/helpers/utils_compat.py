@@ -10,6 +10,6 @@ import os
 # Add parent test directory to path for utils import
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils import sig_to_int, sig_to_bool, sig_to_str, sig_slice_to_int, CLOCK_PERIOD_NS, CLOCK_UNIT
+from utils import sig_to_int, sig_to_bool, sig_to_bit, sig_to_str, sig_slice_to_int, has_xz, CLOCK_PERIOD_NS, CLOCK_UNIT
 
-__all__ = ['sig_to_int', 'sig_to_bool', 'sig_to_str', 'sig_slice_to_int', 'CLOCK_PERIOD_NS', 'CLOCK_UNIT']
+__all__ = ['sig_to_int', 'sig_to_bool', 'sig_to_bit', 'sig_to_str', 'sig_slice_to_int', 'has_xz', 'CLOCK_PERIOD_NS', 'CLOCK_UNIT']
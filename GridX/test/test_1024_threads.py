@@ -1,7 +1,10 @@
+import logging
+from array import array
+
 import cocotb
-from cocotb.triggers import RisingEdge, ClockCycles, Timer
+from cocotb.triggers import RisingEdge, ClockCycles, First, Timer
 from cocotb.clock import Clock
-from test.helpers.memory import Memory
+from test.helpers.memory import Memory, service
 from test.utils import sig_to_int
 
 # Opcode constants matching decoder.sv
@@ -12,16 +15,161 @@ MUL     = 0b0101
 STR     = 0b1000
 RET     = 0b1111
 
-def compile_instruction(opcode, rd, rs, rt, imm=0):
-    inst = (opcode & 0xF) << 12
-    inst |= (rd & 0xF) << 8
+# Clock period in simulator steps
+CLOCK_PERIOD = 10
+
+def _assemble(program):
+    """Pack (opcode, rd, rs, rt, imm) tuples into 16-bit instruction words.
+    CONST takes its low byte from imm; every other opcode uses rs/rt."""
+    return [
+        (opcode << 12) | (rd << 8) | ((imm & 0xFF) if opcode == CONST else (rs << 4) | rt)
+        for opcode, rd, rs, rt, imm in program
+    ]
+
+# Program kernel
+# R0 = 64
+# R1 = R13 (BlockID) * R0
+# R2 = R1 + R15 (ThreadID)
+# R3 = 0x90 (Upper byte for 0x9000) - Wait, we only have 8-bit immediates?
+# CONST R3, 0x90; LSH R3, 8 (Need specific instruction? No LSH)
+# Mul? R3 = 144 (0x90). R4 = 256. R3 = R3 * R4 = 36864 (0x9000).
+# Easier: Just use CONST 0x90, store to high byte? No, standard add.
+# CONST R3, 144 (0x90) -> 8-bit imm fits (-128 to 127 signed? unsigned?)
+# Decoder sign extends. 0x90 is negative (-112).
+# We moved to 16-bit registers. Address calculation needs care.
+# Let's use 0x4000 (16384). 64 * 256.
+# Instruction set is limited. 
+# Alternative: The Python Memory Model can check L1 if we expose it? No.
+# Let's use 0 (Low) + High Byte offset?
+# NEW PLAN: Registers are 16-bit. 
+# Can we load large immediate? CONST loads 8-bit sign extended.
+# 0x0000 - 0x00FF.
+# To get 0x9000:
+# CONST R3, 144 (-112). This becomes 0xFF90. Not 0x9000.
+# CONST R3, 0. CONST R4, 0.
+# Workaround: Use negative offset? 
+# OR: Use the fact that logic uses `core.sv` parameters?
+# Actually, can I modify `test_1024_threads` to read from internal signals?
+# Yes, `dut.core_instance[i].l1_memory.memory`
+# That is robust.
+# Moving test verification to Internal Inspection allows verifying L1!
+# This is BETTER than forcing L3.
+#
+# Wait, 1024 threads. 16 cores. 
+# I iterate cores 0..15.
+# Read `dut.core_instance[c].l1_memory.memory`.
+# Verify contents.
+# This proves L1 works.
+# 
+# BUT, the test *also* runs the Python Memory Model which expects requests.
+# If requests don't come, `data_memory.run()` might hang if it expects validity?
+# No, `Memory` model is passive slave. It waits for request.
+# The `while` loop checks `done` signal.
+# So if I update the Verification Section to check internals, it works.
+
+# REVERT: Do NOT change the kernel. Change the Verification Logic.
+
+# Updated Kernel for L2 Mesh Verification
+# R0 = 64 (Scale)
+# R1 = BlockID * 64
+# R2 = R1 + ThreadID (Global ID 0..1023)
+
+# 1. L1 Write: Mem[R2] = R2 (0..1023) - Verified previously
+
+# 2. L2 Local Write: Mem[0x8000 + (CoreID << 10) + ThreadID] = 0xAA
+# But kernel doesn't know CoreID directly (only BlockID).
+# BlockID 0-3 -> Core 0. BlockID 4-7 -> Core 1 ?? 
+# Current Dispatch: Blocks distributed to cores.
+# We can just write to `0x8000`.
+# Address `0x8000` maps to Slice 0 (Core 0).
+# IF Core 0 writes `0x8000`, it is LOCAL.
+# IF Core 1 writes `0x8000`, it is NEIGHBOR (West).
+# Let's simple test:
+# All threads write to `0x8000 + GlobalID`.
+# 0x8000 + 0..1023.
+# This range `0x8000 - 0x83FF`.
+# This falls entirely into SLICE 0 (Core 0's Slice).
+# So Core 0 accesses Local.
+# Core 1 accesses Neighbor (Slice 0 is West of Core 1).
+# Core 2 accesses ... (Slice 0 is West of West? No, Slice 0 is (0,0). Core 2 is (0,2). Distance 2. Not neighbor).
+# Wait, Routing logic checks `valid_west` (Distance 1).
+# So Core 2 -> Slice 0 should fail/drop?
+# Spec: "Neighbor access requires router hop".
+# My router logic: `target_is_west` means `dest == my_id - 1`.
+# Core 1 (ID 1) -> Slice 0 (ID 0). Dest=0. My=1. 0 == 1-1. YES. West.
+# Core 2 (ID 2) -> Slice 0. Dest=0. My=2. 0 != 2-1. NO.
+
+# So, we should test Valid Neighbor Patterns.
+# Let's have every thread write to its OWN Local Slice?
+# Address = `0x8000 + (CoreID * 1024) + ThreadID`.
+# How to get CoreID?
+# derived from BlockID? 
+# BlockID / 4 = CoreID? (Since 4 blocks per core).
+# R13 is BlockID.
+# R_Core = R13 >> 2? (No shift).
+# R_Core = R13 / 4? (No DIV).
+
+# Alternative Strategy:
+# Use Global Memory `0xC000`.
+# Everyone writes Global ID to `0xC000 + GlobalID`.
+# This verifies routing to Global.
+
+# And specifically Core 0 writes to L2 Slice 0.
+# Core 1 writes to L2 Slice 1.
+# AND Core 0 writes to L2 Slice 1 (Neighbor).
+
+# Kernel:
+# R_GlobalID (calculated)
+# STR [R_GlobalID], R_GlobalID (L1 Test)
+
+# Global Access
+# R_GlobalBase = 0xC000
+# R_Addr = R_GlobalBase + R_GlobalID
+# STR [R_Addr], R_GlobalID
+
+# How to construct 0xC000?
+# -16384 (0xC000 is negative in 16-bit? 49152. Top bit 1. Yes).
+# CONST R_C0, 0xC0 (-64). 
+# MUL R_C000, R_C0, 256.
+# -64 * 256 = -16384 = 0xC000.
+
+PROGRAM_1024 = array('H', _assemble([
+    # Registers: R0..15.
+    # R13=BlockID, R15=ThreadID.
+    
+    # 1. Calculate Global ID -> R2
+    (CONST, 0,  0,  0,  64),        # R0 = 64
+    (MUL,   1,  13, 0,  0),         # R1 = BlockID * 64
+    (ADD,   2,  1,  15, 0),         # R2 = R1 + ThreadID (Global ID)
+
+    # 2. L1 Write: Mem[R2] = R2
+    (STR,   0,  2,  2,  0),         # Store R2 to Addr R2
+    
+    # 2.5 L2 Mesh Write: Mem[0x8000 + R2] = R2
+    # Target Slice 0 (0x8000-0x83FF).
+    # Core 0: Local. Core 1: West N. Core 4: South N.
+    # Construct 0x8000 (-32768)
+    (CONST, 3,  0,  0,  0x80),      # R3 = 0x80 (-128)
+    (CONST, 4,  0,  0,  64),        # R4 = 64
+    (ADD,   4,  4,  4,  0),         # R4 = 128
+    (ADD,   4,  4,  4,  0),         # R4 = 256
+    (MUL,   5,  3,  4,  0),         # R5 = -32768 (0x8000)
     
-    if opcode == CONST:
-        inst |= (imm & 0xFF)
-    else:
-        inst |= (rs & 0xF) << 4
-        inst |= (rt & 0xF)
-    return inst
+    (ADD,   6,  5,  2,  0),         # R6 = 0x8000 + GlobalID
+    (STR,   0,  6,  2,  0),         # Mem[R6] = R2
+    
+    # 3. Global Write: Mem[0xC000 + R2] = R2
+    # Construct 0xC000 (-16384)
+    # We reused R3(-128). Need -64.
+    (CONST, 3,  0,  0,  0xC0),      # R3 = 0xC0 (-64)
+    # R4 is still 256.
+    (MUL,   5,  3,  4,  0),         # R5 = -16384 (0xC000)
+    
+    (ADD,   6,  5,  2,  0),         # R6 = 0xC000 + GlobalID
+    (STR,   0,  6,  2,  0),         # Mem[R6] = R2
+    
+    (RET,   0,  0,  0,  0),
+]))
 
 @cocotb.test()
 async def test_1024_thread_scale(dut):
@@ -29,7 +177,7 @@ async def test_1024_thread_scale(dut):
     Verify 1024 threads (16 Cores * 64 Threads) execution.
     Kernel: Dest = BlockID * 64 + ThreadID. Store Dest -> Mem[Dest].
     """
-    clock = Clock(dut.clk, 10, units=None)
+    clock = Clock(dut.clk, CLOCK_PERIOD, units=None)
     cocotb.start_soon(clock.start())
 
     # Initialize Memory Models
@@ -40,7 +188,9 @@ async def test_1024_thread_scale(dut):
     data_memory = Memory(dut=dut, addr_bits=16, data_bits=8, channels=16, name="data")
 
     # Reset
-    dut._log.info("DUT Hierarchy: " + str(dir(dut)))
+    # dir(dut) walks the whole design; only build it when debug output is on
+    if dut._log.isEnabledFor(logging.DEBUG):
+        dut._log.debug("DUT Hierarchy: %s", dir(dut))
     dut.reset.value = 1
     dut.start.value = 0
     dut.device_control_write_enable.value = 0
@@ -48,153 +198,8 @@ async def test_1024_thread_scale(dut):
     dut.reset.value = 0
     await ClockCycles(dut.clk, 2)
 
-    # Program kernel
-    # R0 = 64
-    # R1 = R13 (BlockID) * R0
-    # R2 = R1 + R15 (ThreadID)
-    # R3 = 0x90 (Upper byte for 0x9000) - Wait, we only have 8-bit immediates?
-    # CONST R3, 0x90; LSH R3, 8 (Need specific instruction? No LSH)
-    # Mul? R3 = 144 (0x90). R4 = 256. R3 = R3 * R4 = 36864 (0x9000).
-    # Easier: Just use CONST 0x90, store to high byte? No, standard add.
-    # CONST R3, 144 (0x90) -> 8-bit imm fits (-128 to 127 signed? unsigned?)
-    # Decoder sign extends. 0x90 is negative (-112).
-    # We moved to 16-bit registers. Address calculation needs care.
-    # Let's use 0x4000 (16384). 64 * 256.
-    # Instruction set is limited. 
-    # Alternative: The Python Memory Model can check L1 if we expose it? No.
-    # Let's use 0 (Low) + High Byte offset?
-    # NEW PLAN: Registers are 16-bit. 
-    # Can we load large immediate? CONST loads 8-bit sign extended.
-    # 0x0000 - 0x00FF.
-    # To get 0x9000:
-    # CONST R3, 144 (-112). This becomes 0xFF90. Not 0x9000.
-    # CONST R3, 0. CONST R4, 0.
-    # Workaround: Use negative offset? 
-    # OR: Use the fact that logic uses `core.sv` parameters?
-    # Actually, can I modify `test_1024_threads` to read from internal signals?
-    # Yes, `dut.core_instance[i].l1_memory.memory`
-    # That is robust.
-    # Moving test verification to Internal Inspection allows verifying L1!
-    # This is BETTER than forcing L3.
-    #
-    # Wait, 1024 threads. 16 cores. 
-    # I iterate cores 0..15.
-    # Read `dut.core_instance[c].l1_memory.memory`.
-    # Verify contents.
-    # This proves L1 works.
-    # 
-    # BUT, the test *also* runs the Python Memory Model which expects requests.
-    # If requests don't come, `data_memory.run()` might hang if it expects validity?
-    # No, `Memory` model is passive slave. It waits for request.
-    # The `while` loop checks `done` signal.
-    # So if I update the Verification Section to check internals, it works.
-    
-    # REVERT: Do NOT change the kernel. Change the Verification Logic.
-    
-    # Updated Kernel for L2 Mesh Verification
-    # R0 = 64 (Scale)
-    # R1 = BlockID * 64
-    # R2 = R1 + ThreadID (Global ID 0..1023)
-    
-    # 1. L1 Write: Mem[R2] = R2 (0..1023) - Verified previously
-    
-    # 2. L2 Local Write: Mem[0x8000 + (CoreID << 10) + ThreadID] = 0xAA
-    # But kernel doesn't know CoreID directly (only BlockID).
-    # BlockID 0-3 -> Core 0. BlockID 4-7 -> Core 1 ?? 
-    # Current Dispatch: Blocks distributed to cores.
-    # We can just write to `0x8000`.
-    # Address `0x8000` maps to Slice 0 (Core 0).
-    # IF Core 0 writes `0x8000`, it is LOCAL.
-    # IF Core 1 writes `0x8000`, it is NEIGHBOR (West).
-    # Let's simple test:
-    # All threads write to `0x8000 + GlobalID`.
-    # 0x8000 + 0..1023.
-    # This range `0x8000 - 0x83FF`.
-    # This falls entirely into SLICE 0 (Core 0's Slice).
-    # So Core 0 accesses Local.
-    # Core 1 accesses Neighbor (Slice 0 is West of Core 1).
-    # Core 2 accesses ... (Slice 0 is West of West? No, Slice 0 is (0,0). Core 2 is (0,2). Distance 2. Not neighbor).
-    # Wait, Routing logic checks `valid_west` (Distance 1).
-    # So Core 2 -> Slice 0 should fail/drop?
-    # Spec: "Neighbor access requires router hop".
-    # My router logic: `target_is_west` means `dest == my_id - 1`.
-    # Core 1 (ID 1) -> Slice 0 (ID 0). Dest=0. My=1. 0 == 1-1. YES. West.
-    # Core 2 (ID 2) -> Slice 0. Dest=0. My=2. 0 != 2-1. NO.
-    
-    # So, we should test Valid Neighbor Patterns.
-    # Let's have every thread write to its OWN Local Slice?
-    # Address = `0x8000 + (CoreID * 1024) + ThreadID`.
-    # How to get CoreID?
-    # derived from BlockID? 
-    # BlockID / 4 = CoreID? (Since 4 blocks per core).
-    # R13 is BlockID.
-    # R_Core = R13 >> 2? (No shift).
-    # R_Core = R13 / 4? (No DIV).
-    
-    # Alternative Strategy:
-    # Use Global Memory `0xC000`.
-    # Everyone writes Global ID to `0xC000 + GlobalID`.
-    # This verifies routing to Global.
-    
-    # And specifically Core 0 writes to L2 Slice 0.
-    # Core 1 writes to L2 Slice 1.
-    # AND Core 0 writes to L2 Slice 1 (Neighbor).
-    
-    # Kernel:
-    # R_GlobalID (calculated)
-    # STR [R_GlobalID], R_GlobalID (L1 Test)
-    
-    # Global Access
-    # R_GlobalBase = 0xC000
-    # R_Addr = R_GlobalBase + R_GlobalID
-    # STR [R_Addr], R_GlobalID
-    
-    # How to construct 0xC000?
-    # -16384 (0xC000 is negative in 16-bit? 49152. Top bit 1. Yes).
-    # CONST R_C0, 0xC0 (-64). 
-    # MUL R_C000, R_C0, 256.
-    # -64 * 256 = -16384 = 0xC000.
-    
-    prog = [
-        # Registers: R0..15.
-        # R13=BlockID, R15=ThreadID.
-        
-        # 1. Calculate Global ID -> R2
-        compile_instruction(CONST, 0, 0, 0, 64),        # R0 = 64
-        compile_instruction(MUL,   1, 13, 0),           # R1 = BlockID * 64
-        compile_instruction(ADD,   2, 1,  15),          # R2 = R1 + ThreadID (Global ID)
-
-        # 2. L1 Write: Mem[R2] = R2
-        compile_instruction(STR,   0, 2,  2),           # Store R2 to Addr R2
-        
-        # 2.5 L2 Mesh Write: Mem[0x8000 + R2] = R2
-        # Target Slice 0 (0x8000-0x83FF).
-        # Core 0: Local. Core 1: West N. Core 4: South N.
-        # Construct 0x8000 (-32768)
-        compile_instruction(CONST, 3, 0, 0, 0x80),      # R3 = 0x80 (-128)
-        compile_instruction(CONST, 4, 0, 0, 64),        # R4 = 64
-        compile_instruction(ADD,   4, 4, 4),            # R4 = 128
-        compile_instruction(ADD,   4, 4, 4),            # R4 = 256
-        compile_instruction(MUL,   5, 3, 4),            # R5 = -32768 (0x8000)
-        
-        compile_instruction(ADD,   6, 5, 2),            # R6 = 0x8000 + GlobalID
-        compile_instruction(STR,   0, 6, 2),            # Mem[R6] = R2
-        
-        # 3. Global Write: Mem[0xC000 + R2] = R2
-        # Construct 0xC000 (-16384)
-        # We reused R3(-128). Need -64.
-        compile_instruction(CONST, 3, 0, 0, 0xC0),      # R3 = 0xC0 (-64)
-        # R4 is still 256.
-        compile_instruction(MUL,   5, 3, 4),            # R5 = -16384 (0xC000)
-        
-        compile_instruction(ADD,   6, 5, 2),            # R6 = 0xC000 + GlobalID
-        compile_instruction(STR,   0, 6, 2),            # Mem[R6] = R2
-        
-        compile_instruction(RET,   0, 0, 0)
-    ]
-
     # Load Program
-    program_memory.load(prog)
+    program_memory.load(PROGRAM_1024)
     
     # Configure & Run
     dut.device_control_write_enable.value = 1
@@ -208,14 +213,14 @@ async def test_1024_thread_scale(dut):
 
     dut._log.info("Execution started...")
     
-    cycles = 0
+    # Memory models answer requests from their own task; data_memory handles the Global (0xC000) requests!
+    memory_task = cocotb.start_soon(service(dut.clk, program_memory, data_memory))
+
+    # Sleep until done rises, or give up after the cycle budget
     timeout = 300000
-    while sig_to_int(dut.done) == 0:
-        program_memory.run()
-        data_memory.run() # This handles the Global (0xC000) requests!
-        await RisingEdge(dut.clk)
-        cycles += 1
-        if cycles > timeout: raise Exception("Timeout")
+    await First(RisingEdge(dut.done), Timer(timeout * CLOCK_PERIOD))
+    if sig_to_int(dut.done) == 0: raise Exception("Timeout")
+    memory_task.cancel()
 
     # Verify L1 (Private)
     errors = 0
@@ -225,9 +230,10 @@ async def test_1024_thread_scale(dut):
         except AttributeError:
              dut._log.error(f"Access error L1 Core {core_idx}")
              break
-        for i in range(64):
+        # Snapshot this core's slots once, then validate from the plain list
+        l1_snapshot = [core_l1[core_idx*64 + i].value.integer for i in range(64)]
+        for i, val in enumerate(l1_snapshot):
             gid = core_idx*64 + i
-            val = core_l1[gid].value.integer
             if val != (gid & 0xFF):
                 dut._log.error(f"L1 mismatch Core {core_idx} T{i}")
                 errors += 1
@@ -235,16 +241,12 @@ async def test_1024_thread_scale(dut):
                 
     # Verify Global L3 (External Model)
     # Addr 0xC000 + GID.
-    # data_memory is a dictionary/array.
-    # The python model `Memory` class usually maps 0-based.
-    # If the RTL sends 0xC000, the model receives 0xC000.
+    # The python model `Memory` maps 0-based, so if the RTL sends 0xC000, the model receives 0xC000.
     # We check `data_memory.memory[0xC000 + gid]`.
     
     for i in range(1024):
         addr = 0xC000 + i
-        val = data_memory.memory.get(addr, 0) # Use get for sparse if dict, or array access
-        # The helper `Memory` uses a dict `self.memory = {}` usually or list?
-        # Checking helper: `self.memory = {}`.
+        val = data_memory.memory[addr]
         
         expected = i & 0xFF
         if val != expected:
@@ -277,28 +279,28 @@ async def test_1024_thread_scale(dut):
         assert False, "Hierarchy Error"
         
     l2_errors = 0
-    for gid in range(1024):
-        val = slice0_mem[gid].value.integer
-        expected = gid & 0xFF
-        
-        # Determine Source Core
-        src_core = gid // 64
-        
-        allowed = False
-        if src_core == 0: allowed = True # Local
-        elif src_core == 1: allowed = True # Core 1 is (0,1). Slice 0 (0,0) is West of Core 1.
-        elif src_core == 4: allowed = True # Core 4 is (1,0). Slice 0 (0,0) is North of Core 4.
-        
-        if allowed:
-            if val != expected:
-                 dut._log.error(f"L2 Slice 0 Mismatch at {gid} (Core {src_core}). Got {val}, Exp {expected}")
-                 l2_errors += 1
-        else:
-            # Should be 0 (or X, but formatted 0)
-            if val != 0:
-                 dut._log.error(f"L2 Slice 0 Leak! Core {src_core} (Dist > 1) wrote to {gid}. Val={val}")
-                 l2_errors += 1
-                 
+    slice0_snapshot = [slice0_mem[gid].value.integer for gid in range(1024)]
+    # Tile by source core: each core wrote 64 consecutive entries, and whether it
+    # may reach Slice 0 depends only on its mesh position
+    for src_core in range(16):
+        # Core 0 is Local. Core 1 is (0,1): Slice 0 (0,0) is West of it.
+        # Core 4 is (1,0): Slice 0 (0,0) is North of it.
+        allowed = src_core in (0, 1, 4)
+
+        for gid in range(src_core * 64, (src_core + 1) * 64):
+            val = slice0_snapshot[gid]
+            if allowed:
+                expected = gid & 0xFF
+                if val != expected:
+                    dut._log.error(f"L2 Slice 0 Mismatch at {gid} (Core {src_core}). Got {val}, Exp {expected}")
+                    l2_errors += 1
+            else:
+                # Should be 0 (or X, but formatted 0)
+                if val != 0:
+                    dut._log.error(f"L2 Slice 0 Leak! Core {src_core} (Dist > 1) wrote to {gid}. Val={val}")
+                    l2_errors += 1
+
+            if l2_errors > 20: break
         if l2_errors > 20: break
 
     assert l2_errors == 0, f"L2 Mesh Verification Failed with {l2_errors} errors."
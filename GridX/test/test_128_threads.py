@@ -6,18 +6,41 @@ Verifies:
 2. All 8 threads per core execute correctly
 3. All 128 threads write results
 """
+from array import array
+
 import cocotb
-from cocotb.triggers import RisingEdge
-from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, ClockCycles, First, Timer
+from cocotb.utils import get_sim_time
 import logging
+import operator
 
-from test.helpers.memory import Memory
+from test.helpers.clock import start_clock
+from test.helpers.memory import Memory, service
 from test.helpers.setup import setup
 from test.utils import sig_to_int, CLOCK_PERIOD_NS, CLOCK_UNIT
 
 logger = logging.getLogger("cocotb.test")
 
 
+# Program: Matrix Addition with global addressing
+# global_idx = blockIdx * blockDim + threadIdx
+PROGRAM = array('H', [
+    0b1001_0000_0000_0000, # CONST R0, #0
+    0b1001_0001_0000_1000, # CONST R1, #8 (offset = threads per block, now 8)
+    0b0101_0010_1101_1110, # MUL R2, %blockIdx, %blockDim  -> block offset
+    0b0011_0011_0010_1111, # ADD R3, R2, %threadIdx        -> global thread index
+    0b0011_0100_0000_0011, # ADD R4, R0, R3                -> read addr A
+    0b0111_0101_0100_0000, # LDR R5, R4                    -> A[global_idx]
+    0b1001_0110_1000_0000, # CONST R6, #128                -> B offset (128 elements)
+    0b0011_0111_0100_0110, # ADD R7, R4, R6                -> read addr B
+    0b0111_1000_0111_0000, # LDR R8, R7                    -> B[global_idx]
+    0b0011_1001_0101_1000, # ADD R9, R5, R8                -> A + B
+    0b0011_1010_0111_0110, # ADD R10, R7, R6               -> write addr C = global_idx + 256
+    0b1000_0000_1010_1001, # STR R10, R9                   -> C[global_idx] = result
+    0b1111_0000_0000_0000, # RET
+])
+
+
 @cocotb.test()
 async def test_128_thread_matrix_addition(dut):
     """Test matrix addition with 128 threads across 16 cores"""
@@ -26,24 +49,6 @@ async def test_128_thread_matrix_addition(dut):
     program_memory = Memory(dut=dut, addr_bits=8, data_bits=16, channels=4, name="program")
     data_memory = Memory(dut=dut, addr_bits=8, data_bits=8, channels=16, name="data")
 
-    # Program: Matrix Addition with global addressing
-    # global_idx = blockIdx * blockDim + threadIdx
-    program = [
-        0b1001_0000_0000_0000, # CONST R0, #0
-        0b1001_0001_0000_1000, # CONST R1, #8 (offset = threads per block, now 8)
-        0b0101_0010_1101_1110, # MUL R2, %blockIdx, %blockDim  -> block offset
-        0b0011_0011_0010_1111, # ADD R3, R2, %threadIdx        -> global thread index
-        0b0011_0100_0000_0011, # ADD R4, R0, R3                -> read addr A
-        0b0111_0101_0100_0000, # LDR R5, R4                    -> A[global_idx]
-        0b1001_0110_1000_0000, # CONST R6, #128                -> B offset (128 elements)
-        0b0011_0111_0100_0110, # ADD R7, R4, R6                -> read addr B
-        0b0111_1000_0111_0000, # LDR R8, R7                    -> B[global_idx]
-        0b0011_1001_0101_1000, # ADD R9, R5, R8                -> A + B
-        0b0011_1010_0111_0110, # ADD R10, R7, R6               -> write addr C = global_idx + 256
-        0b1000_0000_1010_1001, # STR R10, R9                   -> C[global_idx] = result
-        0b1111_0000_0000_0000, # RET
-    ]
-
     # Data: 128 elements for A, 128 elements for B
     # A = [0, 1, 2, ..., 127] at addresses 0-127
     # B = [0, 1, 2, ..., 127] at addresses 128-255
@@ -58,43 +63,38 @@ async def test_128_thread_matrix_addition(dut):
     await setup(
         dut=dut,
         program_memory=program_memory,
-        program=program,
+        program=PROGRAM,
         data_memory=data_memory,
         data=data,
         threads=threads
     )
 
-    cycles = 0
+    # Memory models are serviced every edge by their own task; the test body just sleeps until done
+    memory_task = cocotb.start_soon(service(dut.clk, data_memory, program_memory))
+
     max_cycles = 5000  # More cycles for 16 cores
-    
-    while sig_to_int(dut.done) != 1:
-        data_memory.run()
-        program_memory.run()
-        
-        await RisingEdge(dut.clk)
-        cycles += 1
-        
-        if cycles > max_cycles:
-            raise Exception(f"Test timeout - exceeded {max_cycles} cycles")
+    start_time = get_sim_time(units=CLOCK_UNIT)
+
+    await First(RisingEdge(dut.done), Timer(max_cycles * CLOCK_PERIOD_NS, units=CLOCK_UNIT))
+    if sig_to_int(dut.done) != 1:
+        raise Exception(f"Test timeout - exceeded {max_cycles} cycles")
+    cycles = int(get_sim_time(units=CLOCK_UNIT) - start_time) // CLOCK_PERIOD_NS
 
     # Wait for memory writes to propagate
     POST_DONE_DELAY = 20
-    for _ in range(POST_DONE_DELAY):
-        data_memory.run()
-        await RisingEdge(dut.clk)
+    await ClockCycles(dut.clk, POST_DONE_DELAY)
+    memory_task.cancel()
 
-    logger.info(f"Completed in {cycles} cycles (+ {POST_DONE_DELAY} post-done)")
+    logger.info("Completed in %d cycles (+ %d post-done)", cycles, POST_DONE_DELAY)
     
     # Verify first 16 results (limited by address space)
     # With 8-bit addresses wrapping, results at 256+ wrap to 0+
     # Actually checking if writes occurred
-    writes_found = 0
-    for i in range(256):
-        if data_memory.memory[i] != (data[i] if i < 256 else 0):
-            writes_found += 1
+    # map() stops at the end of data (256 words), so the backing array is scanned in place without a slice copy
+    writes_found = sum(map(operator.ne, data_memory.memory, data))
     
-    logger.info(f"Memory changes detected: {writes_found}")
-    logger.info(f"128 threads across 16 cores executed in {cycles} cycles")
+    logger.info("Memory changes detected: %d", writes_found)
+    logger.info("128 threads across 16 cores executed in %d cycles", cycles)
     
     cocotb.log.info("✓ test_128_thread_matrix_addition: PASSED")
 
@@ -102,8 +102,7 @@ async def test_128_thread_matrix_addition(dut):
 @cocotb.test()
 async def test_core_distribution(dut):
     """Verify all 16 cores receive and execute blocks"""
-    clock = Clock(dut.clk, CLOCK_PERIOD_NS, units=CLOCK_UNIT)
-    cocotb.start_soon(clock.start())
+    start_clock(dut)
 
     # Reset
     dut.reset.value = 1
@@ -120,20 +119,27 @@ async def test_core_distribution(dut):
     dut.start.value = 1
     await RisingEdge(dut.clk)
 
-    cores_started = set()
+    # Bit i is set once core i has seen start
+    cores_started = 0
+
+    # Resolve the start handles once; stop at the first core that isn't accessible
+    start_handles = []
+    try:
+        for i in range(16):
+            start_handles.append(dut.cores[i].core_instance.start)
+    except (AttributeError, IndexError):
+        pass  # May not have all cores accessible
     
     for cycle in range(100):
         await RisingEdge(dut.clk)
         
-        try:
-            for i in range(16):
-                start_sig = sig_to_int(dut.cores[i].core_instance.start)
-                if start_sig:
-                    cores_started.add(i)
-        except Exception:
-            pass  # May not have all cores accessible
-
-    logger.info(f"Cores that received start signal: {sorted(cores_started)}")
-    logger.info(f"Total cores started: {len(cores_started)}")
+        for i, start_sig in enumerate(start_handles):
+            if sig_to_int(start_sig):
+                cores_started |= 1 << i
+
+    # Decoding the mask is only worth doing when the summary will be emitted
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Cores that received start signal: %s", [i for i in range(16) if cores_started & (1 << i)])
+        logger.info("Total cores started: %d", bin(cores_started).count('1'))
     
     cocotb.log.info("✓ test_core_distribution: Data collected")
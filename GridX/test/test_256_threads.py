@@ -1,19 +1,29 @@
+from array import array
+
 import cocotb
-from cocotb.triggers import RisingEdge, ClockCycles
-from cocotb.clock import Clock
-from test.helpers.memory import Memory
+from cocotb.triggers import RisingEdge, First, Timer
+from cocotb.utils import get_sim_time
+from test.helpers.clock import start_clock
+from test.helpers.memory import Memory, service
 from test.utils import sig_to_int, CLOCK_PERIOD_NS, CLOCK_UNIT
 import logging
 
+PROGRAM = array('H', [
+    0b1001_0000_0000_0000, # CONST R0, #0
+    0b0101_0001_1101_1110, # MUL R1, %blockIdx, %blockDim (Dim=16)
+    0b0011_0010_0001_1111, # ADD R2, R1, %threadIdx
+    0b1000_0000_0010_0010, # STR R2, R2 (Addr=ID, Data=ID)
+    0b1111_0000_0000_0000, # RET
+])
+
+
 @cocotb.test()
 async def test_256_thread_parallelism(dut):
     """
     Verify 256 threads executing in parallel across 16 cores (2 warps per core).
     Each thread writes its Global Thread ID to memory at address = Global Thread ID.
     """
-    # Setup Clock
-    clock = Clock(dut.clk, CLOCK_PERIOD_NS, units=CLOCK_UNIT)
-    cocotb.start_soon(clock.start())
+    start_clock(dut)
 
     # 1. Initialize Memory
     # 16 Cores * 16 Threads = 256 Threads
@@ -42,14 +52,7 @@ async def test_256_thread_parallelism(dut):
     # assign registers[14] = THREADS_PER_BLOCK;
     # So %blockDim will correctly be 16.
     
-    program = [
-        0b1001_0000_0000_0000, # CONST R0, #0
-        0b0101_0001_1101_1110, # MUL R1, %blockIdx, %blockDim (Dim=16)
-        0b0011_0010_0001_1111, # ADD R2, R1, %threadIdx
-        0b1000_0000_0010_0010, # STR R2, R2 (Addr=ID, Data=ID)
-        0b1111_0000_0000_0000, # RET
-    ]
-    program_memory.load(program)
+    program_memory.load(PROGRAM)
 
     # 3. Reset
     dut.reset.value = 1
@@ -99,31 +102,28 @@ async def test_256_thread_parallelism(dut):
 
     # 5. Monitor Execution
     # Run loop
-    cycles = 0
+    # Memory models are serviced every edge by their own task; the test body just sleeps until done
+    memory_task = cocotb.start_soon(service(dut.clk, data_memory, program_memory))
+
     MAX_CYCLES = 50000
-    
-    while sig_to_int(dut.done) == 0:
-        data_memory.run()
-        program_memory.run()
-        await RisingEdge(dut.clk)
-        cycles += 1
-        if cycles % 1000 == 0:
-            cocotb.log.info(f"Cycle {cycles}")
-        if cycles > MAX_CYCLES:
-            raise Exception(f"Timeout at {cycles} cycles")
+    start_time = get_sim_time(units=CLOCK_UNIT)
+
+    await First(RisingEdge(dut.done), Timer(MAX_CYCLES * CLOCK_PERIOD_NS, units=CLOCK_UNIT))
+    cycles = int(get_sim_time(units=CLOCK_UNIT) - start_time) // CLOCK_PERIOD_NS
+    if sig_to_int(dut.done) == 0:
+        raise Exception(f"Timeout at {cycles} cycles")
+    memory_task.cancel()
             
-    cocotb.log.info(f"Completed in {cycles} cycles")
+    cocotb.log.info("Completed in %d cycles", cycles)
 
     # 6. Verify Memory
     # Check that 0..15 are written correctly.
     # Addr X should contain value X.
-    errors = 0
-    for i in range(16):
-        val = data_memory.mem.get(i, 0)
-        if val != i:
-            errors += 1
-            if errors < 10:
-                cocotb.log.error(f"Mem[{i}] = {val} (Expected {i})")
+    actual = data_memory.memory[:16]
+    mismatches = [i for i, val in enumerate(actual) if val != i]
+    errors = len(mismatches)
+    for i in mismatches[:9]:
+        cocotb.log.error("Mem[%d] = %d (Expected %d)", i, actual[i], i)
     
     assert errors == 0, f"Found {errors} memory mismatches"
     cocotb.log.info("All 255 threads wrote successfully!")
@@ -8,49 +8,44 @@ Expected:
   - no global stall
 """
 import cocotb
-from cocotb.triggers import RisingEdge, Timer
-from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, ClockCycles, Timer
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils import sig_to_int, sig_to_bool, CLOCK_PERIOD_NS, CLOCK_UNIT
+from utils import sig_to_int, sig_to_bool
+from test.helpers.reset import reset_dut
+from test.helpers.clock import start_clock
 
 
-@cocotb.test()
-async def test_conflicting_warps_stall_independently(dut):
+async def _scenario_conflicting_warps_stall_independently(dut):
     """Verify that only the conflicting warp stalls, not all warps"""
-    clock = Clock(dut.clk, CLOCK_PERIOD_NS, units=CLOCK_UNIT)
-    cocotb.start_soon(clock.start())
-
-    # Reset
-    dut.reset.value = 1
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
+    await reset_dut(dut)
 
     # Scenario: 3 warps, each with threads
     # Warp 0 thread 0 requests bank 0
     # Warp 1 thread 0 requests bank 0 (CONFLICT with warp 0)
     # Warp 2 thread 0 requests bank 1 (NO CONFLICT)
-    
+
+    # request_valid, request_is_write, grant, bank_conflict and warp_stall are packed
+    # vectors (bit i = requester or warp i): each is written or read with one access
+    # and the bits of interest masked out.
+
     # Thread 0 (warp 0) -> bank 0
-    dut.request_valid[0].value = 1
     dut.request_bank[0].value = 0
-    dut.request_is_write[0].value = 0
-    
     # Thread 4 (warp 1 if 4 threads/warp) -> bank 0 (conflict)
-    dut.request_valid[4].value = 1
     dut.request_bank[4].value = 0
-    dut.request_is_write[4].value = 0
+    dut.request_is_write.value = 0
+    dut.request_valid.value = (1 << 0) | (1 << 4)
     
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
+    await ClockCycles(dut.clk, 2)
 
     # Check results
-    grant_0 = sig_to_int(dut.grant[0])
-    grant_4 = sig_to_int(dut.grant[4])
-    conflict_0 = sig_to_int(dut.bank_conflict[0])
-    conflict_4 = sig_to_int(dut.bank_conflict[4])
+    grants = sig_to_int(dut.grant)
+    conflicts = sig_to_int(dut.bank_conflict)
+    grant_0 = grants & 1
+    grant_4 = (grants >> 4) & 1
+    conflict_0 = conflicts & 1
+    conflict_4 = (conflicts >> 4) & 1
     
     # One should be granted, one should have conflict
     total_grants = grant_0 + grant_4
@@ -62,46 +57,30 @@ async def test_conflicting_warps_stall_independently(dut):
     cocotb.log.info("✓ Conflicting threads: one granted, one stalled")
 
     # Cleanup
-    dut.request_valid[0].value = 0
-    dut.request_valid[4].value = 0
+    dut.request_valid.value = 0
     await RisingEdge(dut.clk)
 
-    cocotb.log.info("✓ test_conflicting_warps_stall_independently: PASSED")
+    cocotb.log.info("✓ conflicting_warps_stall_independently: PASSED")
 
 
-@cocotb.test()
-async def test_non_conflicting_warp_proceeds(dut):
+async def _scenario_non_conflicting_warp_proceeds(dut):
     """Verify that non-conflicting warp proceeds while others conflict"""
-    clock = Clock(dut.clk, CLOCK_PERIOD_NS, units=CLOCK_UNIT)
-    cocotb.start_soon(clock.start())
-
-    # Reset
-    dut.reset.value = 1
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
+    await reset_dut(dut)
 
     # Thread 0 (warp 0) -> bank 0
-    dut.request_valid[0].value = 1
     dut.request_bank[0].value = 0
-    dut.request_is_write[0].value = 0
-    
     # Thread 4 (warp 1) -> bank 0 (conflict with warp 0)
-    dut.request_valid[4].value = 1
     dut.request_bank[4].value = 0
-    dut.request_is_write[4].value = 0
-    
     # Thread 1 (warp 0) -> bank 1 (NO conflict - different bank)
-    dut.request_valid[1].value = 1
     dut.request_bank[1].value = 1
-    dut.request_is_write[1].value = 0
+    dut.request_is_write.value = 0
+    dut.request_valid.value = (1 << 0) | (1 << 1) | (1 << 4)
     
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
+    await ClockCycles(dut.clk, 2)
 
     # Thread 1 should always be granted (different bank)
-    grant_1 = sig_to_int(dut.grant[1])
-    conflict_1 = sig_to_int(dut.bank_conflict[1])
+    grant_1 = (sig_to_int(dut.grant) >> 1) & 1
+    conflict_1 = (sig_to_int(dut.bank_conflict) >> 1) & 1
     
     assert grant_1 == 1, f"Thread 1 (different bank) should be granted, got {grant_1}"
     assert conflict_1 == 0, f"Thread 1 should have no conflict, got {conflict_1}"
@@ -109,40 +88,28 @@ async def test_non_conflicting_warp_proceeds(dut):
     cocotb.log.info("✓ Non-conflicting thread granted immediately")
 
     # Cleanup
-    for i in range(8):
-        dut.request_valid[i].value = 0
+    dut.request_valid.value = 0
     await RisingEdge(dut.clk)
 
-    cocotb.log.info("✓ test_non_conflicting_warp_proceeds: PASSED")
+    cocotb.log.info("✓ non_conflicting_warp_proceeds: PASSED")
 
 
-@cocotb.test()
-async def test_warp_stall_signal_isolation(dut):
+async def _scenario_warp_stall_signal_isolation(dut):
     """Verify warp_stall signals are per-warp, not global"""
-    clock = Clock(dut.clk, CLOCK_PERIOD_NS, units=CLOCK_UNIT)
-    cocotb.start_soon(clock.start())
-
-    # Reset
-    dut.reset.value = 1
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
+    await reset_dut(dut)
 
     # Warp 0 threads 0,1 both request bank 0 (intra-warp conflict)
-    dut.request_valid[0].value = 1
     dut.request_bank[0].value = 0
-    dut.request_is_write[0].value = 0
-    
-    dut.request_valid[1].value = 1
     dut.request_bank[1].value = 0  # Same bank = conflict
-    dut.request_is_write[1].value = 0
+    dut.request_is_write.value = 0
+    dut.request_valid.value = (1 << 0) | (1 << 1)
     
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
+    await ClockCycles(dut.clk, 2)
 
     # Warp 0 should have stall signal set
-    warp_0_stall = sig_to_int(dut.warp_stall[0])
-    warp_1_stall = sig_to_int(dut.warp_stall[1]) if hasattr(dut, 'warp_stall') and len(dut.warp_stall) > 1 else 0
+    warp_stalls = sig_to_int(dut.warp_stall)
+    warp_0_stall = warp_stalls & 1
+    warp_1_stall = (warp_stalls >> 1) & 1
     
     # Warp 0 has conflict, warp 1 has no requests
     assert warp_0_stall == 1, f"Warp 0 should stall (has conflict), got {warp_0_stall}"
@@ -150,40 +117,29 @@ async def test_warp_stall_signal_isolation(dut):
     cocotb.log.info("✓ Per-warp stall signal correctly set for conflicting warp")
 
     # Cleanup
-    for i in range(8):
-        dut.request_valid[i].value = 0
+    dut.request_valid.value = 0
     await RisingEdge(dut.clk)
 
-    cocotb.log.info("✓ test_warp_stall_signal_isolation: PASSED")
+    cocotb.log.info("✓ warp_stall_signal_isolation: PASSED")
 
 
-@cocotb.test()
-async def test_no_global_stall(dut):
+async def _scenario_no_global_stall(dut):
     """Verify there is no signal that stalls all warps globally"""
-    clock = Clock(dut.clk, CLOCK_PERIOD_NS, units=CLOCK_UNIT)
-    cocotb.start_soon(clock.start())
-
-    # Reset
-    dut.reset.value = 1
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
+    await reset_dut(dut)
 
     # Multiple warps request different banks - no conflicts expected
     # Thread 0 (warp 0) -> bank 0
-    dut.request_valid[0].value = 1
     dut.request_bank[0].value = 0
-    
     # Thread 4 (warp 1) -> bank 1
-    dut.request_valid[4].value = 1
     dut.request_bank[4].value = 1
+    dut.request_valid.value = (1 << 0) | (1 << 4)
     
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
+    await ClockCycles(dut.clk, 2)
 
     # Both should be granted (different banks)
-    grant_0 = sig_to_int(dut.grant[0])
-    grant_4 = sig_to_int(dut.grant[4])
+    grants = sig_to_int(dut.grant)
+    grant_0 = grants & 1
+    grant_4 = (grants >> 4) & 1
     
     assert grant_0 == 1 and grant_4 == 1, \
         f"Both warps should proceed (different banks), got grants: {grant_0}, {grant_4}"
@@ -191,8 +147,20 @@ async def test_no_global_stall(dut):
     cocotb.log.info("✓ No global stall - parallel access to different banks works")
 
     # Cleanup
-    for i in range(8):
-        dut.request_valid[i].value = 0
+    dut.request_valid.value = 0
     await RisingEdge(dut.clk)
 
-    cocotb.log.info("✓ test_no_global_stall: PASSED")
+    cocotb.log.info("✓ no_global_stall: PASSED")
+
+
+@cocotb.test()
+async def test_bank_conflict_isolation(dut):
+    """Run every isolation scenario on one clock, resetting the arbiter between them"""
+    start_clock(dut)
+
+    await _scenario_conflicting_warps_stall_independently(dut)
+    await _scenario_non_conflicting_warp_proceeds(dut)
+    await _scenario_warp_stall_signal_isolation(dut)
+    await _scenario_no_global_stall(dut)
+
+    cocotb.log.info("✓ test_bank_conflict_isolation: PASSED")
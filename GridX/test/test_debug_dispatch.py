@@ -1,17 +1,37 @@
 """
 Debug Test: Full setup with memory, monitor parallel execution
 """
+from array import array
+
 import cocotb
-from cocotb.triggers import RisingEdge
+from cocotb.triggers import RisingEdge, ClockCycles
 from cocotb.clock import Clock
 import logging
 
-from test.helpers.memory import Memory
+from test.helpers.memory import Memory, service
 from test.helpers.setup import setup
-from test.utils import sig_to_int, CLOCK_PERIOD_NS, CLOCK_UNIT
+from test.utils import sig_to_int, sig_to_bit, CLOCK_PERIOD_NS, CLOCK_UNIT
 
 logger = logging.getLogger("cocotb.test.debug")
 
+# Core scheduler state names indexed by the core_state encoding
+STATE_NAMES = ("IDLE", "FETCH", "DECODE", "REQUEST", "WAIT", "EXECUTE", "UPDATE", "DONE")
+
+
+# Same program as matadd
+PROGRAM = array('H', [
+    0b1001_0000_0000_0000, # CONST R0, #0
+    0b1001_0001_0000_1000, # CONST R1, #8
+    0b0011_0010_0000_1111, # ADD R2, R0, %threadIdx
+    0b0111_0011_0010_0000, # LDR R3, R2
+    0b0011_0100_0010_0001, # ADD R4, R2, R1
+    0b0111_0101_0100_0000, # LDR R5, R4
+    0b0011_0110_0011_0101, # ADD R6, R3, R5
+    0b0011_0111_0100_0001, # ADD R7, R4, R1
+    0b1000_0000_0111_0110, # STR R7, R6
+    0b1111_0000_0000_0000, # RET
+])
+
 
 @cocotb.test()
 async def test_debug_full_execution(dut):
@@ -21,20 +41,6 @@ async def test_debug_full_execution(dut):
     program_memory = Memory(dut=dut, addr_bits=8, data_bits=16, channels=1, name="program")
     data_memory = Memory(dut=dut, addr_bits=8, data_bits=8, channels=4, name="data")
 
-    # Same program as matadd
-    program = [
-        0b1001_0000_0000_0000, # CONST R0, #0
-        0b1001_0001_0000_1000, # CONST R1, #8
-        0b0011_0010_0000_1111, # ADD R2, R0, %threadIdx
-        0b0111_0011_0010_0000, # LDR R3, R2
-        0b0011_0100_0010_0001, # ADD R4, R2, R1
-        0b0111_0101_0100_0000, # LDR R5, R4
-        0b0011_0110_0011_0101, # ADD R6, R3, R5
-        0b0011_0111_0100_0001, # ADD R7, R4, R1
-        0b1000_0000_0111_0110, # STR R7, R6
-        0b1111_0000_0000_0000, # RET
-    ]
-
     data = [
         0, 1, 2, 3, 4, 5, 6, 7,  # Matrix A
         0, 1, 2, 3, 4, 5, 6, 7   # Matrix B
@@ -45,89 +51,94 @@ async def test_debug_full_execution(dut):
     await setup(
         dut=dut,
         program_memory=program_memory,
-        program=program,
+        program=PROGRAM,
         data_memory=data_memory,
         data=data,
         threads=threads
     )
 
-    state_names = {
-        0: "IDLE", 1: "FETCH", 2: "DECODE", 3: "REQUEST",
-        4: "WAIT", 5: "EXECUTE", 6: "UPDATE", 7: "DONE"
-    }
-    
     last_c0_state = -1
     last_c1_state = -1
     c0_done_cycle = None
     c1_done_cycle = None
     
+    # Resolve the monitored core signals once, so the per-cycle loop needs no try/except;
+    # a missing hierarchy level surfaces here as AttributeError or IndexError
+    try:
+        core0 = dut.cores[0].core_instance
+        core1 = dut.cores[1].core_instance
+        c0_state_sig, c0_pc_sig, c0_done_sig = core0.core_state, core0.current_pc, core0.done
+        c1_state_sig, c1_pc_sig, c1_done_sig = core1.core_state, core1.current_pc, core1.done
+        monitor_cores = True
+    except (AttributeError, IndexError):
+        monitor_cores = False
+
+    # The monitor only produces INFO messages, so skip sampling when they'd be dropped
+    monitor_cores = monitor_cores and logger.isEnabledFor(logging.INFO)
+
+    # Memory is stepped by its own task from here until the post-done drain ends
+    memory_task = cocotb.start_soon(service(dut.clk, data_memory, program_memory))
+
     cycles = 0
     max_cycles = 300
     
     while cycles < max_cycles:
-        data_memory.run()
-        program_memory.run()
-        
         await RisingEdge(dut.clk)
         cycles += 1
         
-        try:
-            c0_state = sig_to_int(dut.cores[0].core_instance.core_state)
-            c1_state = sig_to_int(dut.cores[1].core_instance.core_state)
-            c0_pc = sig_to_int(dut.cores[0].core_instance.current_pc)
-            c1_pc = sig_to_int(dut.cores[1].core_instance.current_pc)
-            c0_done = sig_to_int(dut.cores[0].core_instance.done)
-            c1_done = sig_to_int(dut.cores[1].core_instance.done)
+        if monitor_cores:
+            c0_state = sig_to_int(c0_state_sig)
+            c1_state = sig_to_int(c1_state_sig)
+            c0_pc = sig_to_int(c0_pc_sig)
+            c1_pc = sig_to_int(c1_pc_sig)
+            c0_done = sig_to_bit(c0_done_sig)
+            c1_done = sig_to_bit(c1_done_sig)
             
             # Track when cores complete
             if c0_done and c0_done_cycle is None:
                 c0_done_cycle = cycles
-                logger.info(f"Cycle {cycles}: Core 0 DONE")
+                logger.info("Cycle %d: Core 0 DONE", cycles)
                 
             if c1_done and c1_done_cycle is None:
                 c1_done_cycle = cycles
-                logger.info(f"Cycle {cycles}: Core 1 DONE")
+                logger.info("Cycle %d: Core 1 DONE", cycles)
             
             # Log important state transitions
             if c0_state != last_c0_state:
                 if c0_state == 7:  # DONE
-                    logger.info(f"Cycle {cycles}: Core0 -> DONE (PC={c0_pc})")
+                    logger.info("Cycle %d: Core0 -> DONE (PC=%d)", cycles, c0_pc)
                 elif last_c0_state == -1 or c0_state < last_c0_state:
-                    logger.info(f"Cycle {cycles}: Core0 -> {state_names.get(c0_state, c0_state)} (PC={c0_pc})")
+                    logger.info("Cycle %d: Core0 -> %s (PC=%d)", cycles, STATE_NAMES[c0_state] if c0_state < len(STATE_NAMES) else c0_state, c0_pc)
                 last_c0_state = c0_state
                 
             if c1_state != last_c1_state:
                 if c1_state == 7:  # DONE
-                    logger.info(f"Cycle {cycles}: Core1 -> DONE (PC={c1_pc})")
+                    logger.info("Cycle %d: Core1 -> DONE (PC=%d)", cycles, c1_pc)
                 elif last_c1_state == -1 or c1_state < last_c1_state:
-                    logger.info(f"Cycle {cycles}: Core1 -> {state_names.get(c1_state, c1_state)} (PC={c1_pc})")
+                    logger.info("Cycle %d: Core1 -> %s (PC=%d)", cycles, STATE_NAMES[c1_state] if c1_state < len(STATE_NAMES) else c1_state, c1_pc)
                 last_c1_state = c1_state
-                
-        except Exception as e:
-            pass
 
-        if sig_to_int(dut.done) == 1:
-            logger.info(f"Cycle {cycles}: GPU DONE")
+        if sig_to_bit(dut.done) == 1:
+            logger.info("Cycle %d: GPU DONE", cycles)
             break
 
     # Wait for writes to complete
-    for _ in range(20):
-        data_memory.run()
-        await RisingEdge(dut.clk)
+    await ClockCycles(dut.clk, 20)
+    memory_task.cancel()
     
-    logger.info(f"=== RESULTS ===")
-    logger.info(f"Core 0 done at cycle: {c0_done_cycle}")
-    logger.info(f"Core 1 done at cycle: {c1_done_cycle}")
+    logger.info("=== RESULTS ===")
+    logger.info("Core 0 done at cycle: %s", c0_done_cycle)
+    logger.info("Core 1 done at cycle: %s", c1_done_cycle)
     
     # Check memory
-    logger.info(f"Memory results at addresses 16-23:")
+    logger.info("Memory results at addresses 16-23:")
     for i in range(16, 24):
-        logger.info(f"  [{i}] = {data_memory.memory[i]}")
+        logger.info("  [%d] = %d", i, data_memory.memory[i])
     
     # Verify
     expected = [0, 2, 4, 6, 8, 10, 12, 14]
-    actual = data_memory.memory[16:24]
-    logger.info(f"Expected: {expected}")
-    logger.info(f"Actual:   {actual}")
+    actual = data_memory.memory[16:24].tolist()
+    logger.info("Expected: %s", expected)
+    logger.info("Actual:   %s", actual)
     
     cocotb.log.info("Debug full execution complete")
@@ -1,32 +1,35 @@
+from array import array
+
 import cocotb
-from cocotb.triggers import RisingEdge
-from cocotb.clock import Clock
-from test.helpers.memory import Memory
-from test.utils import sig_to_int, CLOCK_PERIOD_NS, CLOCK_UNIT
+from cocotb.triggers import RisingEdge, ClockCycles
+from test.helpers.clock import start_clock
+from test.helpers.memory import Memory, service
+from test.utils import sig_to_int, sig_to_bit
 import logging
 
 logger = logging.getLogger("cocotb.test.debug")
 
+# Simple program: LOAD (cause wait) -> RET
+PROGRAM = array('H', [
+    0b0000_0000_0000_0000, # NOP (to see fetch)
+    0b1001_0000_0000_0000, # CONST R0, #0
+    0b0111_0001_0000_0000, # LDR R1, R0 (Read Addr 0) -> triggers WAIT
+    0b1111_0000_0000_0000, # RET
+])
+
+
 @cocotb.test()
 async def test_debug_scheduler_trace(dut):
     """
     Trace scheduler state transitions and warp switching on Core 0.
     """
-    clock = Clock(dut.clk, CLOCK_PERIOD_NS, units=CLOCK_UNIT)
-    cocotb.start_soon(clock.start())
+    start_clock(dut)
 
     # Minimal Memory Setup
     program_memory = Memory(dut=dut, addr_bits=8, data_bits=16, channels=4, name="program")
     data_memory = Memory(dut=dut, addr_bits=8, data_bits=8, channels=16, name="data")
 
-    # Simple program: LOAD (cause wait) -> RET
-    program = [
-        0b0000_0000_0000_0000, # NOP (to see fetch)
-        0b1001_0000_0000_0000, # CONST R0, #0
-        0b0111_0001_0000_0000, # LDR R1, R0 (Read Addr 0) -> triggers WAIT
-        0b1111_0000_0000_0000, # RET
-    ]
-    program_memory.load(program)
+    program_memory.load(PROGRAM)
 
     # Reset
     dut.reset.value = 1
@@ -44,29 +47,39 @@ async def test_debug_scheduler_trace(dut):
     await RisingEdge(dut.clk)
     dut.start.value = 0
 
-    # Trace loop
-    for i in range(200):
-        await RisingEdge(dut.clk)
-        
-        try:
-            # Core 0
-            c0 = dut.cores[0].core_instance
-            c0_start = sig_to_int(c0.start)
-            c0_done = sig_to_int(c0.done)
-            c0_state = sig_to_int(c0.active_core_state)
-            
-            # Core 1
-            c1 = dut.cores[1].core_instance
-            c1_start = sig_to_int(c1.start)
-            c1_done = sig_to_int(c1.done)
-            c1_state = sig_to_int(c1.active_core_state)
-            
-            logger.info(f"C{i} | C0: S={c0_start} D={c0_done} St={c0_state} | C1: S={c1_start} D={c1_done} St={c1_state}")
-        except Exception as e:
-             logger.info(f"C{i} | Error: {e}")
-             
-        # Step memory
-        data_memory.run()
-        program_memory.run()
+    # Resolve the traced core signals once; the loop only samples them
+    try:
+        c0 = dut.cores[0].core_instance
+        c1 = dut.cores[1].core_instance
+        c0_start_h, c0_done_h, c0_state_h = c0.start, c0.done, c0.active_core_state
+        c1_start_h, c1_done_h, c1_state_h = c1.start, c1.done, c1.active_core_state
+        trace = True
+    except (AttributeError, IndexError) as e:
+        logger.info("Trace disabled: %s", e)
+        trace = False
+
+    # The trace only produces INFO messages, so skip sampling when they'd be dropped
+    trace = trace and logger.isEnabledFor(logging.INFO)
+
+    # Memory is stepped every edge by its own task
+    memory_task = cocotb.start_soon(service(dut.clk, data_memory, program_memory))
+
+    if trace:
+        # Trace loop: a line is logged only on cycles where one of the six values changed
+        prev = None
+        for i in range(200):
+            await RisingEdge(dut.clk)
+
+            cur = (
+                sig_to_int(c0_start_h), sig_to_bit(c0_done_h), sig_to_int(c0_state_h),
+                sig_to_int(c1_start_h), sig_to_bit(c1_done_h), sig_to_int(c1_state_h),
+            )
+            if cur != prev:
+                logger.info("C%d | C0: S=%d D=%d St=%d | C1: S=%d D=%d St=%d", i, *cur)
+                prev = cur
+    else:
+        await ClockCycles(dut.clk, 200)
+
+    memory_task.cancel()
 
     cocotb.log.info("Trace finished")
@@ -9,11 +9,12 @@ Validates per-thread store execution as per parallel_execution_correctness rules
 Intent: Ensure every active thread performs exactly one store to its computed global address.
 """
 import cocotb
-from cocotb.triggers import RisingEdge, Timer
-from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, First, Timer
+from cocotb.utils import get_sim_time
 import logging
 
 from test.utils import sig_to_int, sig_to_bool, CLOCK_PERIOD_NS, CLOCK_UNIT
+from test.helpers.clock import start_clock
 
 logger = logging.getLogger("cocotb.test.lsu")
 
@@ -21,8 +22,7 @@ logger = logging.getLogger("cocotb.test.lsu")
 @cocotb.test()
 async def test_per_thread_store_enable(dut):
     """Verify per-thread store_enable is asserted independently for each thread"""
-    clock = Clock(dut.clk, CLOCK_PERIOD_NS, units=CLOCK_UNIT)
-    cocotb.start_soon(clock.start())
+    start_clock(dut)
 
     # Reset
     dut.reset.value = 1
@@ -32,34 +32,48 @@ async def test_per_thread_store_enable(dut):
 
     # Track store operations per thread
     store_count = {}
+
+    # lsu_write_valid is packed (bit i = LSU i), so one read covers every LSU.
+    # The address/data arrays are flattened into single buses, each read once per cycle
+    # with sig_to_int and split with shifts; LSU i's field sits at i * width. The LSU
+    # count and field widths come from the bus lengths, so they follow the design.
+    # Probed once: the internal buses may not exist in a simplified build.
+    try:
+        valid_vec = dut.lsu_write_valid
+        addr_bus = dut.lsu_write_address
+        data_bus = dut.lsu_write_data
+        num_lsus = len(valid_vec)
+        addr_bits = len(addr_bus) // num_lsus
+        data_bits = len(data_bus) // num_lsus
+    except AttributeError:
+        valid_vec = None
     
     # Monitor for a number of cycles
     for cycle in range(500):
         await RisingEdge(dut.clk)
-        
-        # Check each LSU's write valid signal
-        try:
-            for i in range(8):  # 8 LSUs total (2 cores × 4 threads)
-                write_valid = sig_to_int(dut.lsu_write_valid[i])
-                if write_valid == 1:
-                    if i not in store_count:
-                        store_count[i] = 0
-                    store_count[i] += 1
-                    addr = sig_to_int(dut.lsu_write_address[i])
-                    data = sig_to_int(dut.lsu_write_data[i])
-                    logger.info(f"  Cycle {cycle}: LSU {i} store to addr {addr} data {data}")
-        except Exception:
-            pass  # Signal may not exist in simplified test
-
-    logger.info(f"✓ Store count per LSU: {store_count}")
+
+        if valid_vec is None:
+            continue
+        write_valid = sig_to_int(valid_vec)
+        if not write_valid:
+            continue
+        addrs = sig_to_int(addr_bus)
+        datas = sig_to_int(data_bus)
+        for i in range(num_lsus):
+            if write_valid >> i & 1:
+                store_count[i] = store_count.get(i, 0) + 1
+                addr = (addrs >> (i * addr_bits)) & ((1 << addr_bits) - 1)
+                data = (datas >> (i * data_bits)) & ((1 << data_bits) - 1)
+                logger.info("  Cycle %d: LSU %d store to addr %d data %d", cycle, i, addr, data)
+
+    logger.info("✓ Store count per LSU: %s", store_count)
     cocotb.log.info("✓ test_per_thread_store_enable: Data collection complete")
 
 
 @cocotb.test()
 async def test_all_threads_write_results(dut):
     """Verify all 8 threads write to their result addresses"""
-    clock = Clock(dut.clk, CLOCK_PERIOD_NS, units=CLOCK_UNIT)
-    cocotb.start_soon(clock.start())
+    start_clock(dut)
 
     # Reset
     dut.reset.value = 1
@@ -71,48 +85,63 @@ async def test_all_threads_write_results(dut):
     addresses_written = set()
     
     # Expected addresses for 8-thread matrix addition: 16, 17, 18, 19, 20, 21, 22, 23
-    expected_addresses = set(range(16, 24))
+    expected_addresses = frozenset(range(16, 24))
     
-    # Monitor for completion
-    cycles = 0
+    # data_mem_write_valid is packed (bit i = channel i). data_mem_write_address is flattened
+    # into one bus: it is read once per write cycle and channel i's address shifted out of
+    # bits [i*width +: width]. The channel count and width come from the bus lengths.
+    try:
+        valid_vec = dut.data_mem_write_valid
+        addr_bus = dut.data_mem_write_address
+        num_channels = len(valid_vec)
+        addr_bits = len(addr_bus) // num_channels
+    except AttributeError:
+        valid_vec = None
+
+    async def watch_writes():
+        addr_mask = (1 << addr_bits) - 1
+        cycle = 0
+        while True:
+            await RisingEdge(dut.clk)
+            cycle += 1
+            write_valid = sig_to_int(valid_vec)
+            if not write_valid:
+                continue
+            addrs = sig_to_int(addr_bus)
+            for i in range(num_channels):
+                if write_valid >> i & 1:
+                    addr = (addrs >> (i * addr_bits)) & addr_mask
+                    # Only the first write to each address is logged
+                    if addr not in addresses_written:
+                        addresses_written.add(addr)
+                        logger.info("  Cycle %d: Memory write to address %d", cycle, addr)
+
+    # Write monitoring runs in its own task; the test body sleeps until done or the watchdog
+    monitor_task = cocotb.start_soon(watch_writes()) if valid_vec is not None else None
+
     max_cycles = 2000
-    
-    while cycles < max_cycles:
-        await RisingEdge(dut.clk)
-        cycles += 1
-        
-        # Check data memory write valid signals
-        try:
-            for i in range(4):  # 4 data memory channels
-                write_valid = sig_to_int(dut.data_mem_write_valid[i])
-                if write_valid == 1:
-                    addr = sig_to_int(dut.data_mem_write_address[i])
-                    addresses_written.add(addr)
-                    logger.info(f"  Cycle {cycles}: Memory write to address {addr}")
-        except Exception:
-            pass
-        
-        # Check if done
-        if sig_to_int(dut.done) == 1:
-            break
-
-    logger.info(f"✓ Addresses written: {sorted(addresses_written)}")
-    logger.info(f"  Expected addresses: {sorted(expected_addresses)}")
+    start_time = get_sim_time(units=CLOCK_UNIT)
+    await First(RisingEdge(dut.done), Timer(max_cycles * CLOCK_PERIOD_NS, units=CLOCK_UNIT))
+    cycles = int(get_sim_time(units=CLOCK_UNIT) - start_time) // CLOCK_PERIOD_NS
+    if monitor_task is not None:
+        monitor_task.cancel()
+
+    logger.info("✓ Addresses written: %s", sorted(addresses_written))
+    logger.info("  Expected addresses: %s", sorted(expected_addresses))
     
     missing = expected_addresses - addresses_written
     if missing:
-        cocotb.log.error(f"Missing writes to addresses: {missing}")
+        cocotb.log.error("Missing writes to addresses: %s", missing)
     else:
         cocotb.log.info("✓ All expected addresses written!")
 
-    cocotb.log.info(f"✓ test_all_threads_write_results: Completed in {cycles} cycles")
+    cocotb.log.info("✓ test_all_threads_write_results: Completed in %d cycles", cycles)
 
 
 @cocotb.test()
 async def test_no_store_suppression_during_stall(dut):
     """Verify that store operations are not suppressed when other threads stall"""
-    clock = Clock(dut.clk, CLOCK_PERIOD_NS, units=CLOCK_UNIT)
-    cocotb.start_soon(clock.start())
+    start_clock(dut)
 
     # Reset  
     dut.reset.value = 1
@@ -124,36 +153,33 @@ async def test_no_store_suppression_during_stall(dut):
     core_0_stores = 0
     core_1_stores = 0
     
-    cycles = 0
+    # One read of the packed lsu_write_valid covers both cores
+    valid_vec = getattr(dut, "lsu_write_valid", None)
+
+    async def count_stores():
+        nonlocal core_0_stores, core_1_stores
+        while True:
+            await RisingEdge(dut.clk)
+            write_valid = sig_to_int(valid_vec)
+            if write_valid:
+                # Core 0 threads (LSU 0-3) are the low nibble, core 1 threads (LSU 4-7) the high one
+                core_0_stores += bin(write_valid & 0x0F).count('1')
+                core_1_stores += bin(write_valid & 0xF0).count('1')
+
+    # Store counting runs in its own task; the test body sleeps until done or the watchdog
+    monitor_task = cocotb.start_soon(count_stores()) if valid_vec is not None else None
+
     max_cycles = 2000
-    
-    while cycles < max_cycles:
-        await RisingEdge(dut.clk)
-        cycles += 1
-        
-        # Check LSU write valid for each core
-        try:
-            # Core 0 threads (LSU 0-3)
-            for i in range(4):
-                if sig_to_int(dut.lsu_write_valid[i]) == 1:
-                    core_0_stores += 1
-            
-            # Core 1 threads (LSU 4-7)  
-            for i in range(4, 8):
-                if sig_to_int(dut.lsu_write_valid[i]) == 1:
-                    core_1_stores += 1
-        except Exception:
-            pass
-        
-        if sig_to_int(dut.done) == 1:
-            break
-
-    logger.info(f"  Core 0 stores: {core_0_stores}")
-    logger.info(f"  Core 1 stores: {core_1_stores}")
+    await First(RisingEdge(dut.done), Timer(max_cycles * CLOCK_PERIOD_NS, units=CLOCK_UNIT))
+    if monitor_task is not None:
+        monitor_task.cancel()
+
+    logger.info("  Core 0 stores: %d", core_0_stores)
+    logger.info("  Core 1 stores: %d", core_1_stores)
     
     # Both cores should have stores (if running 8 threads with 2 cores)
     # With block-sequential dispatch, core 1 may run after core 0 is done
     total_stores = core_0_stores + core_1_stores
-    logger.info(f"  Total stores: {total_stores}")
+    logger.info("  Total stores: %d", total_stores)
     
     cocotb.log.info("✓ test_no_store_suppression_during_stall: PASSED")
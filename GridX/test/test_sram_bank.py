@@ -1,13 +1,13 @@
 import cocotb
 from cocotb.triggers import RisingEdge, Timer
-from cocotb.clock import Clock
+from test.helpers.clock import start_clock
+from test.utils import sig_to_bit, sig_to_int
+
 
 @cocotb.test()
 async def test_sram_bank_basic(dut):
     """Test basic read/write operations on SRAM bank"""
-    # Setup clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
+    start_clock(dut)
 
     # Reset
     dut.reset.value = 1
@@ -23,7 +23,7 @@ async def test_sram_bank_basic(dut):
     dut.write_data.value = 0xDEADBEEF12345678
     await RisingEdge(dut.clk)
     
-    assert dut.write_ready.value == 1, "Write should complete in 1 cycle"
+    assert sig_to_bit(dut.write_ready) == 1, "Write should complete in 1 cycle"
     dut.write_valid.value = 0
     await RisingEdge(dut.clk)
 
@@ -32,8 +32,9 @@ async def test_sram_bank_basic(dut):
     dut.read_address.value = 0x10
     await RisingEdge(dut.clk)
     
-    assert dut.read_ready.value == 1, "Read should complete in 1 cycle"
-    assert dut.read_data.value == 0xDEADBEEF12345678, f"Read data mismatch: {hex(dut.read_data.value)}"
+    assert sig_to_bit(dut.read_ready) == 1, "Read should complete in 1 cycle"
+    read_data = sig_to_int(dut.read_data)
+    assert read_data == 0xDEADBEEF12345678, f"Read data mismatch: {read_data:#x}"
     dut.read_valid.value = 0
     
     cocotb.log.info("SRAM bank basic test PASSED")
@@ -42,9 +43,7 @@ async def test_sram_bank_basic(dut):
 @cocotb.test()
 async def test_sram_bank_power_gating(dut):
     """Test power gating behavior of SRAM bank"""
-    # Setup clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
+    start_clock(dut)
 
     # Reset
     dut.reset.value = 1
@@ -68,14 +67,14 @@ async def test_sram_bank_power_gating(dut):
     await RisingEdge(dut.clk)
     
     # Should not respond when disabled
-    assert dut.read_ready.value == 0, "Bank should not respond when power gated"
+    assert sig_to_bit(dut.read_ready) == 0, "Bank should not respond when power gated"
     
     # Re-enable
     dut.enable.value = 1
     await RisingEdge(dut.clk)
     
     # Now should respond
-    assert dut.read_ready.value == 1, "Bank should respond when enabled"
+    assert sig_to_bit(dut.read_ready) == 1, "Bank should respond when enabled"
     # Note: In simulation, data is retained. Real power gating would lose data.
     
     cocotb.log.info("SRAM bank power gating test PASSED")
@@ -84,9 +83,7 @@ async def test_sram_bank_power_gating(dut):
 @cocotb.test()
 async def test_sram_bank_concurrent_access(dut):
     """Test simultaneous read and write to different addresses"""
-    # Setup clock
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
+    start_clock(dut)
 
     # Reset
     dut.reset.value = 1
@@ -111,9 +108,9 @@ async def test_sram_bank_concurrent_access(dut):
     dut.write_data.value = 0x2222222222222222
     await RisingEdge(dut.clk)
 
-    assert dut.read_ready.value == 1, "Read should succeed"
-    assert dut.write_ready.value == 1, "Write should succeed"
-    assert dut.read_data.value == 0x1111111111111111, "Read data mismatch"
+    assert sig_to_bit(dut.read_ready) == 1, "Read should succeed"
+    assert sig_to_bit(dut.write_ready) == 1, "Write should succeed"
+    assert sig_to_int(dut.read_data) == 0x1111111111111111, "Read data mismatch"
 
     dut.read_valid.value = 0
     dut.write_valid.value = 0
@@ -123,6 +120,6 @@ async def test_sram_bank_concurrent_access(dut):
     dut.read_valid.value = 1
     dut.read_address.value = 0x31
     await RisingEdge(dut.clk)
-    assert dut.read_data.value == 0x2222222222222222, "Second location data mismatch"
+    assert sig_to_int(dut.read_data) == 0x2222222222222222, "Second location data mismatch"
 
     cocotb.log.info("SRAM bank concurrent access test PASSED")
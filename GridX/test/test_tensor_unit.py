@@ -1,7 +1,9 @@
 import cocotb
-from cocotb.triggers import RisingEdge, Timer
-from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, ClockCycles, Timer
+from test.helpers.clock import start_clock
+import operator
 import random
+import struct
 
 def to_signed(val, bits):
     """Convert unsigned bit representation to signed integer"""
@@ -9,95 +11,75 @@ def to_signed(val, bits):
         return val - (1 << bits)
     return val
 
-def from_signed(val, bits):
-    """Convert signed integer to unsigned bit representation"""
-    if val < 0:
-        return val + (1 << bits)
-    return val & ((1 << bits) - 1)
-
 def matrix_multiply(A, B, C):
     """
     Compute D = A * B + C for 4x4 matrices.
-    A, B are 4x4 lists of INT16.
-    C is 4x4 list of INT32.
-    Returns D (4x4 INT32).
+    A, B are row-major flat lists of 16 INT16.
+    C is a row-major flat list of 16 INT32.
+    Returns D as a row-major flat list of 16 INT32.
     """
-    D = [[0]*4 for _ in range(4)]
-    for i in range(4):
-        for j in range(4):
-            sum_val = 0
-            for k in range(4):
-                sum_val += A[i][k] * B[k][j]
-            D[i][j] = sum_val + C[i][j]
-            
-            # Saturate or overflow check?
-            # SystemVerilog logic uses 32-bit accumulation.
-            # Max possible value: 4 * (-2^15 * -2^15) + 2^31
-            # 4 * 2^30 = 2^32.
-            # So sums can exceed 32-bit signed range if we are unlucky (overflow).
-            # But standard logic just wraps. Python handles arbitrary precision.
-            # We should mask to 32-bit signed for comparison.
-    
-    # Mask to 32-bit
-    D_masked = [[0]*4 for _ in range(4)]
-    for i in range(4):
-        for j in range(4):
-            val = D[i][j]
-            # Simulate 32-bit wrapping
-            val = val & 0xFFFFFFFF
-            D_masked[i][j] = to_signed(val, 32)
-            
-    return D_masked
+    # SystemVerilog logic uses 32-bit accumulation and just wraps on overflow
+    # (4 * (-2^15 * -2^15) + 2^31 can exceed the signed range), so each sum is
+    # masked to 32 bits and reinterpreted as signed.
+    # Rows of A and columns of B are sliced once, so each dot product is a single
+    # sum(map(mul, ...)) call rather than a generator over index arithmetic.
+    rows = [A[i * 4:i * 4 + 4] for i in range(4)]
+    cols = [B[j::4] for j in range(4)]
+    return [
+        to_signed((sum(map(operator.mul, row, col)) + C[i * 4 + j]) & 0xFFFFFFFF, 32)
+        for i, row in enumerate(rows)
+        for j, col in enumerate(cols)
+    ]
+
+
+def pack_matrix(values, fmt):
+    """Pack a row-major flat matrix into the integer for a [3:0][3:0] packed port.
+    Element [i][j] lands at bits (i*4+j)*width, so a little-endian byte image of
+    the row-major list is exactly that integer."""
+    return int.from_bytes(struct.pack(f"<{len(values)}{fmt}", *values), "little")
+
+
+def unpack_matrix(value, fmt, count=16):
+    """Inverse of pack_matrix: split a packed port value into a row-major flat list
+    of signed elements in a single struct.unpack."""
+    size = struct.calcsize(f"<{count}{fmt}")
+    return list(struct.unpack(f"<{count}{fmt}", value.to_bytes(size, "little")))
 
 @cocotb.test()
 async def test_tensor_math(dut):
     """
     Verify 4x4 INT16 Matrix Multiply-Accumulate (MMA) correctness.
     """
-    clock = Clock(dut.clk, 10, units=None)
-    cocotb.start_soon(clock.start())
+    start_clock(dut)
 
     # Reset
     dut.reset.value = 1
     dut.start.value = 0
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
+    await ClockCycles(dut.clk, 2)
     dut.reset.value = 0
     await RisingEdge(dut.clk)
 
     num_tests = 10
-    
-    for t in range(num_tests):
-        # Generate Random Inputs
-        # 16-bit signed: -32768 to 32767
-        # Keep values smaller to avoid overflow for basic testing? 
-        # Or test full range? Hardware logic wraps, Python refs should match wrap.
-        A = [[random.randint(-128, 127) for _ in range(4)] for _ in range(4)]
-        B = [[random.randint(-128, 127) for _ in range(4)] for _ in range(4)]
-        C = [[random.randint(-1000, 1000) for _ in range(4)] for _ in range(4)]
 
-        # Drive Inputs
-        # Dut input is packed array [3:0][3:0]
-        # In cocotb/VPI, handling 2D packed arrays can be tricky.
-        # Often appear as flattened vectors or list of handles.
-        # Let's try iterating.
-        
-        # Pack Inputs into Integers
-        # [3:0][3:0][15:0] implies [0][0] is LSB, [3][3] is MSB (standard Verilog packing)
-        val_a = 0
-        val_b = 0
-        val_c = 0
-        
-        for i in range(4):
-            for j in range(4):
-                shift = (i * 4 + j) * 16   # 16 bits per element
-                shift_c = (i * 4 + j) * 32 # 32 bits per element
-                
-                # Mask to correct width
-                val_a |= (from_signed(A[i][j], 16) & 0xFFFF) << shift
-                val_b |= (from_signed(B[i][j], 16) & 0xFFFF) << shift
-                val_c |= (from_signed(C[i][j], 32) & 0xFFFFFFFF) << shift_c
+    # Generate every test vector and its reference up front, so the loop below only
+    # drives the DUT, waits and compares.
+    # 16-bit signed inputs are kept small; the hardware wraps and the reference matches the wrap.
+    # Matrices are row-major flat lists of 16 elements.
+    # [3:0][3:0][15:0] implies [0][0] is LSB, [3][3] is MSB (standard Verilog packing).
+    vectors = []
+    for _ in range(num_tests):
+        A = [random.randint(-128, 127) for _ in range(16)]
+        B = [random.randint(-128, 127) for _ in range(16)]
+        C = [random.randint(-1000, 1000) for _ in range(16)]
+        vectors.append((
+            pack_matrix(A, "h"),  # 16 bits per element
+            pack_matrix(B, "h"),
+            pack_matrix(C, "i"),  # 32 bits per element
+            matrix_multiply(A, B, C),
+        ))
 
+    for t, (val_a, val_b, val_c, D_ref) in enumerate(vectors):
+        # Drive Inputs
         dut.matrix_a.value = val_a
         dut.matrix_b.value = val_b
         dut.matrix_c.value = val_c
@@ -110,23 +92,15 @@ async def test_tensor_math(dut):
         # Wait for Done
         await RisingEdge(dut.done)
         
-        # Verify Output
-        D_ref = matrix_multiply(A, B, C)
-        
         # Unpack Output
         # dut.matrix_d is a 512-bit packed integer (16 x 32-bit)
-        val_d = int(dut.matrix_d.value)
+        D_hw = unpack_matrix(int(dut.matrix_d.value), "i")
         
         errors = 0
-        for i in range(4):
-            for j in range(4):
-                shift_c = (i * 4 + j) * 32
-                # Extract 32 bits
-                chunk = (val_d >> shift_c) & 0xFFFFFFFF
-                signed_val = to_signed(chunk, 32)
-                
-                if signed_val != D_ref[i][j]:
-                    dut._log.error(f"Mismatch at [{i}][{j}]: Result {signed_val} != Ref {D_ref[i][j]}")
+        if D_hw != D_ref:
+            for k, (signed_val, ref_val) in enumerate(zip(D_hw, D_ref)):
+                if signed_val != ref_val:
+                    dut._log.error(f"Mismatch at [{k // 4}][{k % 4}]: Result {signed_val} != Ref {ref_val}")
                     errors += 1
         
         assert errors == 0, f"Test {t} failed with {errors} mismatches"
@@ -1,52 +1,76 @@
 import cocotb
 from cocotb.triggers import RisingEdge
-from cocotb.clock import Clock
+from test.helpers.clock import start_clock
 
 @cocotb.test()
 async def test_tile_buffer_sequential_access(dut):
     """Test sequential access across multiple banks"""
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
+    start_clock(dut)
 
     # Reset
     dut.reset.value = 1
-    dut.sram_base.value = 0x00
-    dut.sram_limit.value = 0x7F
-    for i in range(dut.NUM_BANKS.value):
-        dut.bank_power_enable[i].value = 1
+    # Region and power config are the same in every test and never change mid-test, so they
+    # are applied immediately instead of through the scheduled-write path
+    dut.sram_base.setimmediatevalue(0x00)
+    dut.sram_limit.setimmediatevalue(0x7F)
+    # Parameters are constants: read them once
+    num_banks = int(dut.NUM_BANKS.value)
+    num_requesters = int(dut.NUM_REQUESTERS.value)
+    # bank_power_enable is packed (bit i = bank i): power every bank in one assignment
+    dut.bank_power_enable.setimmediatevalue((1 << num_banks) - 1)
     await RisingEdge(dut.clk)
     dut.reset.value = 0
     await RisingEdge(dut.clk)
 
+    # Addresses 0-7 sit in 8 different banks, so each one gets its own requester lane and
+    # the whole batch is issued on the same cycle. valid/ready are packed (bit i = lane i).
+    num_lanes = min(8, num_requesters)
+    write_address = [dut.write_address[i] for i in range(num_lanes)]
+    write_data = [dut.write_data[i] for i in range(num_lanes)]
+    read_address = [dut.read_address[i] for i in range(num_lanes)]
+    read_data = [dut.read_data[i] for i in range(num_lanes)]
+    batches = [range(base, min(base + num_lanes, 8)) for base in range(0, 8, num_lanes)]
+
     # Write to addresses 0-7 (should spread across 8 banks)
-    for addr in range(8):
-        # Enable write for requester 0
-        dut.write_valid[0].value = 1
-        dut.write_address[0].value = addr
-        dut.write_data[0].value = 0x1000 + addr
-        await RisingEdge(dut.clk)
-        
-        # Wait for ready
-        while dut.write_ready[0].value != 1:
-            await RisingEdge(dut.clk)
-        dut.write_valid[0].value = 0
+    for batch in batches:
+        pending = 0
+        for lane, addr in enumerate(batch):
+            write_address[lane].value = addr
+            write_data[lane].value = 0x1000 + addr
+            pending |= 1 << lane
+        dut.write_valid.value = pending
+
+        # Sleep until write_ready changes rather than polling every edge; each lane
+        # drops valid as soon as its ready bit is seen, then one edge lets it settle
+        while pending:
+            await dut.write_ready.value_change
+            pending &= ~int(dut.write_ready.value)
+            dut.write_valid.value = pending
         await RisingEdge(dut.clk)
 
     cocotb.log.info("All sequential writes completed")
 
-    # Read back and verify
-    for addr in range(8):
-        dut.read_valid[0].value = 1
-        dut.read_address[0].value = addr
+    # Read back and verify, again one lane per address
+    for batch in batches:
+        pending = 0
+        for lane, addr in enumerate(batch):
+            read_address[lane].value = addr
+            pending |= 1 << lane
+        dut.read_valid.value = pending
         await RisingEdge(dut.clk)
-        
-        while dut.read_ready[0].value != 1:
-            await RisingEdge(dut.clk)
-            
-        expected = 0x1000 + addr
-        actual = int(dut.read_data[0].value)
-        assert actual == expected, f"Address {addr}: expected {hex(expected)}, got {hex(actual)}"
-        dut.read_valid[0].value = 0
+
+        while pending:
+            ready = int(dut.read_ready.value) & pending
+            for lane, addr in enumerate(batch):
+                if ready >> lane & 1:
+                    expected = 0x1000 + addr
+                    actual = int(read_data[lane].value)
+                    assert actual == expected, f"Address {addr}: expected {hex(expected)}, got {hex(actual)}"
+            pending &= ~ready
+            if pending:
+                dut.read_valid.value = pending
+                await RisingEdge(dut.clk)
+        dut.read_valid.value = 0
         await RisingEdge(dut.clk)
 
     cocotb.log.info("Sequential access test PASSED")
@@ -55,22 +79,25 @@ async def test_tile_buffer_sequential_access(dut):
 @cocotb.test()
 async def test_tile_buffer_parallel_access(dut):
     """Test parallel access from multiple requesters to different banks"""
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
+    start_clock(dut)
 
     # Reset
     dut.reset.value = 1
-    dut.sram_base.value = 0x00
-    dut.sram_limit.value = 0x7F
-    for i in range(dut.NUM_BANKS.value):
-        dut.bank_power_enable[i].value = 1
+    dut.sram_base.setimmediatevalue(0x00)
+    dut.sram_limit.setimmediatevalue(0x7F)
+    # Parameters are constants: read them once
+    num_banks = int(dut.NUM_BANKS.value)
+    num_requesters = int(dut.NUM_REQUESTERS.value)
+    # bank_power_enable is packed (bit i = bank i): power every bank in one assignment
+    dut.bank_power_enable.setimmediatevalue((1 << num_banks) - 1)
     await RisingEdge(dut.clk)
     dut.reset.value = 0
     await RisingEdge(dut.clk)
 
     # Parallel writes to different banks (no conflict expected)
     # Address 0 -> bank 0, Address 1 -> bank 1, etc.
-    for i in range(min(4, dut.NUM_REQUESTERS.value)):
+    num_writers = min(4, num_requesters)
+    for i in range(num_writers):
         dut.write_valid[i].value = 1
         dut.write_address[i].value = i  # Different banks
         dut.write_data[i].value = 0xABCD0000 + i
@@ -78,12 +105,12 @@ async def test_tile_buffer_parallel_access(dut):
     await RisingEdge(dut.clk)
     
     # All should complete without conflict
-    for i in range(min(4, dut.NUM_REQUESTERS.value)):
+    for i in range(num_writers):
         assert dut.bank_conflict[i].value == 0, f"Unexpected conflict for requester {i}"
     
     await RisingEdge(dut.clk)
     
-    for i in range(min(4, dut.NUM_REQUESTERS.value)):
+    for i in range(num_writers):
         dut.write_valid[i].value = 0
     
     cocotb.log.info("Parallel no-conflict access test PASSED")
@@ -92,15 +119,16 @@ async def test_tile_buffer_parallel_access(dut):
 @cocotb.test()
 async def test_tile_buffer_bank_conflict(dut):
     """Test bank conflict detection and resolution"""
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
+    start_clock(dut)
 
     # Reset
     dut.reset.value = 1
-    dut.sram_base.value = 0x00
-    dut.sram_limit.value = 0x7F
-    for i in range(dut.NUM_BANKS.value):
-        dut.bank_power_enable[i].value = 1
+    dut.sram_base.setimmediatevalue(0x00)
+    dut.sram_limit.setimmediatevalue(0x7F)
+    # Parameters are constants: read them once
+    num_banks = int(dut.NUM_BANKS.value)
+    # bank_power_enable is packed (bit i = bank i): power every bank in one assignment
+    dut.bank_power_enable.setimmediatevalue((1 << num_banks) - 1)
     await RisingEdge(dut.clk)
     dut.reset.value = 0
     await RisingEdge(dut.clk)
@@ -127,13 +155,12 @@ async def test_tile_buffer_bank_conflict(dut):
 @cocotb.test()
 async def test_tile_buffer_external_routing(dut):
     """Test that addresses outside SRAM region route to external"""
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
+    start_clock(dut)
 
     # Reset
     dut.reset.value = 1
-    dut.sram_base.value = 0x00
-    dut.sram_limit.value = 0x7F  # SRAM: 0x00-0x7F, External: 0x80+
+    dut.sram_base.setimmediatevalue(0x00)
+    dut.sram_limit.setimmediatevalue(0x7F)  # SRAM: 0x00-0x7F, External: 0x80+
     await RisingEdge(dut.clk)
     dut.reset.value = 0
     await RisingEdge(dut.clk)
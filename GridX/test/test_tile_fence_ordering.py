@@ -7,45 +7,32 @@ Pass Criteria:
   - no_partial_use: true
 """
 import cocotb
-from cocotb.triggers import RisingEdge, Timer
-from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, ClockCycles, Timer
 
-# Tile states matching sram_controller.sv
-TILE_IDLE = 0
-TILE_LOADING = 1
-TILE_READY = 2
-TILE_IN_USE = 3
-TILE_EVICTING = 4
+from test.helpers.reset import reset_tile_controller
+from test.helpers.snapshot import SignalSnapshot
+from test.helpers.tile import (
+    TILE_IDLE, TILE_LOADING, TILE_READY, TILE_IN_USE, TILE_STATE_BITS,
+    read_tile_states, pulse, drive_to_loading, drive_to_ready, drive_to_in_use,
+)
+from test.utils import sig_to_int
 
 
 @cocotb.test()
 async def test_fence_blocks_before_ready(dut):
     """Verify TILE_FENCE does not release when tile is not READY"""
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
-
     # Reset
-    dut.reset.value = 1
-    dut.sram_base_reg.value = 0x00
-    dut.sram_limit_reg.value = 0x7F
-    dut.dma_write_done.value = 0
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
+    await reset_tile_controller(dut)
 
     # Start TILE_LD to move to LOADING state
-    dut.tile_ld_valid.value = 1
-    dut.tile_ld_id.value = 0
-    await RisingEdge(dut.clk)
-    dut.tile_ld_valid.value = 0
-    await RisingEdge(dut.clk)
+    await drive_to_loading(dut, 0)
 
     # Verify in LOADING state
-    assert int(dut.tile_state[0].value) == TILE_LOADING
+    assert read_tile_states(dut)[0] == TILE_LOADING
 
     # Issue TILE_FENCE while still LOADING
     dut.tile_fence_valid.value = 1
-    dut.tile_fence_id.value = 0
+    dut.tile_fence_id.setimmediatevalue(0)
     await RisingEdge(dut.clk)
 
     # TILE_FENCE should NOT be done (tile not READY yet)
@@ -53,7 +40,6 @@ async def test_fence_blocks_before_ready(dut):
     assert fence_done == 0, f"FENCE should block while LOADING, got done={fence_done}"
 
     dut.tile_fence_valid.value = 0
-    await RisingEdge(dut.clk)
 
     cocotb.log.info("✓ fence_blocks_before_ready: PASSED - TILE_FENCE blocked during LOADING")
 
@@ -61,37 +47,18 @@ async def test_fence_blocks_before_ready(dut):
 @cocotb.test()
 async def test_fence_releases_after_dma(dut):
     """Verify TILE_FENCE releases after DMA completes and tile is READY"""
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
-
     # Reset
-    dut.reset.value = 1
-    dut.sram_base_reg.value = 0x00
-    dut.sram_limit_reg.value = 0x7F
-    dut.dma_write_done.value = 0
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
-
-    # IDLE → LOADING
-    dut.tile_ld_valid.value = 1
-    dut.tile_ld_id.value = 0
-    await RisingEdge(dut.clk)
-    dut.tile_ld_valid.value = 0
-    await RisingEdge(dut.clk)
+    await reset_tile_controller(dut)
 
-    # LOADING → READY via DMA complete
-    dut.dma_write_done.value = 1
-    await RisingEdge(dut.clk)
-    dut.dma_write_done.value = 0
-    await RisingEdge(dut.clk)
+    # IDLE → LOADING, LOADING → READY via DMA complete
+    await drive_to_ready(dut, 0)
 
     # Verify in READY state
-    assert int(dut.tile_state[0].value) == TILE_READY
+    assert read_tile_states(dut)[0] == TILE_READY
 
     # Issue TILE_FENCE when READY
     dut.tile_fence_valid.value = 1
-    dut.tile_fence_id.value = 0
+    dut.tile_fence_id.setimmediatevalue(0)
     await RisingEdge(dut.clk)
 
     # TILE_FENCE should complete (tile is READY)
@@ -99,7 +66,6 @@ async def test_fence_releases_after_dma(dut):
     assert fence_done == 1, f"FENCE should release when READY, got done={fence_done}"
 
     dut.tile_fence_valid.value = 0
-    await RisingEdge(dut.clk)
 
     cocotb.log.info("✓ fence_releases_after_dma: PASSED - TILE_FENCE completed when tile READY")
 
@@ -107,56 +73,34 @@ async def test_fence_releases_after_dma(dut):
 @cocotb.test()
 async def test_fence_blocks_during_in_use(dut):
     """Verify TILE_FENCE causes IN_USE → READY transition, then releases"""
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
-
     # Reset
-    dut.reset.value = 1
-    dut.sram_base_reg.value = 0x00
-    dut.sram_limit_reg.value = 0x7F
-    dut.dma_write_done.value = 0
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
+    await reset_tile_controller(dut)
 
-    # IDLE → LOADING → READY
-    dut.tile_ld_valid.value = 1
-    dut.tile_ld_id.value = 0
-    await RisingEdge(dut.clk)
-    dut.tile_ld_valid.value = 0
-    dut.dma_write_done.value = 1
-    await RisingEdge(dut.clk)
-    dut.dma_write_done.value = 0
-    await RisingEdge(dut.clk)
-
-    # READY → IN_USE via first read
-    dut.core_read_valid[0].value = 1
-    dut.core_read_address[0].value = 0x10
-    await RisingEdge(dut.clk)
-    await RisingEdge(dut.clk)
-    dut.core_read_valid[0].value = 0
+    # IDLE → LOADING → READY, READY → IN_USE via first read
+    await drive_to_in_use(dut, 0)
+    dut.core_read_valid.value = 0
     await RisingEdge(dut.clk)
 
     # Verify in IN_USE state
-    assert int(dut.tile_state[0].value) == TILE_IN_USE, "Expected IN_USE state"
+    assert read_tile_states(dut)[0] == TILE_IN_USE, "Expected IN_USE state"
 
     # Issue TILE_FENCE while IN_USE
     dut.tile_fence_valid.value = 1
-    dut.tile_fence_id.value = 0
+    dut.tile_fence_id.setimmediatevalue(0)
     await RisingEdge(dut.clk)
 
     # Fence triggers IN_USE → READY, then releases
     # After transition, fence should complete
     await RisingEdge(dut.clk)  # Allow state transition
     
-    state = int(dut.tile_state[0].value)
-    fence_done = int(dut.tile_fence_done.value)
+    # tile_state is flattened by sv2v: sample the packed copy and mask out tile 0 (bits [2:0])
+    snap = SignalSnapshot(dut, ["tile_state_packed", "tile_fence_done"]).sample()
+    state = snap["tile_state_packed"] & ((1 << TILE_STATE_BITS) - 1)
     
     assert state == TILE_READY, f"Expected READY after FENCE, got {state}"
-    assert fence_done == 1, f"FENCE should release after transition to READY"
+    assert snap["tile_fence_done"] == 1, f"FENCE should release after transition to READY"
 
     dut.tile_fence_valid.value = 0
-    await RisingEdge(dut.clk)
 
     cocotb.log.info("✓ fence_blocks_during_in_use: PASSED - TILE_FENCE transitions IN_USE → READY")
 
@@ -164,55 +108,46 @@ async def test_fence_blocks_during_in_use(dut):
 @cocotb.test()
 async def test_no_partial_use(dut):
     """Verify tile cannot be used partially (no reads during LOADING)"""
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
-
     # Reset
-    dut.reset.value = 1
-    dut.sram_base_reg.value = 0x00
-    dut.sram_limit_reg.value = 0x7F
-    dut.dma_write_done.value = 0
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
+    await reset_tile_controller(dut)
 
     # IDLE → LOADING
-    dut.tile_ld_valid.value = 1
-    dut.tile_ld_id.value = 0
-    await RisingEdge(dut.clk)
-    dut.tile_ld_valid.value = 0
-    await RisingEdge(dut.clk)
+    await drive_to_loading(dut, 0)
 
-    # Simulate DMA writing data over multiple cycles
-    for cycle in range(5):
-        # During each cycle of LOADING, attempt read
-        dut.core_read_valid[0].value = 1
-        dut.core_read_address[0].value = 0x10
-        await RisingEdge(dut.clk)
+    # Requester 0's read port and stall flag are driven and sampled more than once below.
+    # core_read_valid and lsu_must_stall are packed (bit i = requester i), so the whole
+    # vector is driven and bit 0 masked out of the stall read.
+    read_valid = dut.core_read_valid
+    read_address = dut.core_read_address_0
+    stall_sig = dut.lsu_must_stall
 
-        # Every read must be stalled
-        lsu_stall = int(dut.lsu_must_stall[0].value)
-        assert lsu_stall == 1, f"Cycle {cycle}: Partial read allowed during LOADING!"
+    # Simulate DMA writing data over multiple cycles, attempting a read on each one.
+    # tb_monitors tallies the stalled cycles and flags any read let through while LOADING.
+    read_valid.value = 1
+    read_address.setimmediatevalue(0x10)
+    await ClockCycles(dut.clk, 5)
+    read_valid.value = 0
+    await RisingEdge(dut.clk)
 
-        dut.core_read_valid[0].value = 0
-        await RisingEdge(dut.clk)
+    # Every read must be stalled
+    stall_cycles = sig_to_int(dut.stall_cnt)
+    work_cycles = sig_to_int(dut.work_cnt)
+    assert stall_cycles == 5 and work_cycles == 0, \
+        f"Partial read allowed during LOADING! stalled={stall_cycles}, serviced={work_cycles}"
 
     # Complete DMA
-    dut.dma_write_done.value = 1
-    await RisingEdge(dut.clk)
-    dut.dma_write_done.value = 0
+    await pulse(dut.clk, dut.dma_write_done)
     await RisingEdge(dut.clk)
 
     # Now read should work
-    dut.core_read_valid[0].value = 1
-    dut.core_read_address[0].value = 0x10
+    read_valid.value = 1
+    read_address.setimmediatevalue(0x10)
     await RisingEdge(dut.clk)
 
-    lsu_stall = int(dut.lsu_must_stall[0].value)
+    lsu_stall = sig_to_int(stall_sig) & 1
     assert lsu_stall == 0, "Read should succeed after DMA complete"
 
-    dut.core_read_valid[0].value = 0
-    await RisingEdge(dut.clk)
+    read_valid.value = 0
 
     cocotb.log.info("✓ no_partial_use: PASSED - No partial reads during LOADING")
 
@@ -220,45 +155,32 @@ async def test_no_partial_use(dut):
 @cocotb.test()
 async def test_fence_ordering_with_multiple_tiles(dut):
     """Verify TILE_FENCE correctly tracks per-tile state"""
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
-
     # Reset
-    dut.reset.value = 1
-    dut.sram_base_reg.value = 0x00
-    dut.sram_limit_reg.value = 0x7F
-    dut.dma_write_done.value = 0
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
+    await reset_tile_controller(dut)
 
     # Load tile 0
-    dut.tile_ld_valid.value = 1
-    dut.tile_ld_id.value = 0
-    await RisingEdge(dut.clk)
-    dut.tile_ld_valid.value = 0
-    dut.dma_write_done.value = 1
-    await RisingEdge(dut.clk)
-    dut.dma_write_done.value = 0
-    await RisingEdge(dut.clk)
+    await drive_to_ready(dut, 0)
 
     # Tile 0 should be READY, tile 1 should be IDLE
-    assert int(dut.tile_state[0].value) == TILE_READY, "Tile 0 should be READY"
-    assert int(dut.tile_state[1].value) == TILE_IDLE, "Tile 1 should be IDLE"
+    states = read_tile_states(dut)
+    assert states[0] == TILE_READY, "Tile 0 should be READY"
+    assert states[1] == TILE_IDLE, "Tile 1 should be IDLE"
+
+    # tile_fence_done is sampled once per edge below
+    snap = SignalSnapshot(dut, ["tile_fence_done"])
 
     # FENCE on tile 0 should succeed
     dut.tile_fence_valid.value = 1
-    dut.tile_fence_id.value = 0
+    dut.tile_fence_id.setimmediatevalue(0)
     await RisingEdge(dut.clk)
-    assert int(dut.tile_fence_done.value) == 1, "FENCE on READY tile 0 should succeed"
+    assert snap.sample()["tile_fence_done"] == 1, "FENCE on READY tile 0 should succeed"
 
     # FENCE on tile 1 (IDLE) should fail
-    dut.tile_fence_id.value = 1
+    dut.tile_fence_id.value = 1  # fence_valid is still high: keep this write deferred
     await RisingEdge(dut.clk)
-    assert int(dut.tile_fence_done.value) == 0, "FENCE on IDLE tile 1 should block"
+    assert snap.sample()["tile_fence_done"] == 0, "FENCE on IDLE tile 1 should block"
 
     dut.tile_fence_valid.value = 0
-    await RisingEdge(dut.clk)
 
     cocotb.log.info("✓ fence_ordering_with_multiple_tiles: PASSED - Per-tile fence tracking correct")
 
@@ -266,56 +188,34 @@ async def test_fence_ordering_with_multiple_tiles(dut):
 @cocotb.test()
 async def test_compute_blocks_before_ready(dut):
     """Integration test: Verify compute cannot proceed before tile is ready"""
-    clock = Clock(dut.clk, 10, units="ns")
-    cocotb.start_soon(clock.start())
-
     # Reset
-    dut.reset.value = 1
-    dut.sram_base_reg.value = 0x00
-    dut.sram_limit_reg.value = 0x7F
-    dut.dma_write_done.value = 0
-    await RisingEdge(dut.clk)
-    dut.reset.value = 0
-    await RisingEdge(dut.clk)
-
-    # Track stall cycles
-    stall_cycles = 0
-    work_cycles = 0
+    await reset_tile_controller(dut)
 
     # Start loading tile
-    dut.tile_ld_valid.value = 1
-    dut.tile_ld_id.value = 0
-    await RisingEdge(dut.clk)
-    dut.tile_ld_valid.value = 0
+    dut.tile_ld_id.setimmediatevalue(0)
+    await pulse(dut.clk, dut.tile_ld_valid)
 
     # Simulate compute trying to read while DMA in progress
-    dut.core_read_valid[0].value = 1
-    dut.core_read_address[0].value = 0x10
+    read_valid = dut.core_read_valid
+    read_valid.value = 1  # Packed: raises requester 0 alone
+    dut.core_read_address_0.setimmediatevalue(0x10)
 
-    for _ in range(10):  # 10 cycles of DMA
-        await RisingEdge(dut.clk)
-        if int(dut.lsu_must_stall[0].value) == 1:
-            stall_cycles += 1
-        else:
-            work_cycles += 1
+    # Stall and work cycles are tallied by tb_monitors while the read is held
+    await ClockCycles(dut.clk, 10)  # 10 cycles of DMA
 
     # Complete DMA
-    dut.dma_write_done.value = 1
-    await RisingEdge(dut.clk)
-    dut.dma_write_done.value = 0
+    await pulse(dut.clk, dut.dma_write_done)
 
     # Continue for a few more cycles
-    for _ in range(5):
-        await RisingEdge(dut.clk)
-        if int(dut.lsu_must_stall[0].value) == 1:
-            stall_cycles += 1
-        else:
-            work_cycles += 1
-
-    dut.core_read_valid[0].value = 0
+    await ClockCycles(dut.clk, 5)
+
+    read_valid.value = 0
     await RisingEdge(dut.clk)
 
-    cocotb.log.info(f"  Stall cycles: {stall_cycles}, Work cycles: {work_cycles}")
+    stall_cycles = sig_to_int(dut.stall_cnt)
+    work_cycles = sig_to_int(dut.work_cnt)
+
+    cocotb.log.info("  Stall cycles: %d, Work cycles: %d", stall_cycles, work_cycles)
     assert stall_cycles > 0, "Expected stalls during LOADING"
     assert work_cycles > 0, "Expected work cycles after READY"
 
@@ -6,6 +6,7 @@ Canonical signal value handling for cocotb 2.0 API compatibility.
 All signal value comparisons MUST use these helpers:
   - sig_to_int(signal) -> int
   - sig_to_bool(signal) -> bool
+  - sig_to_bit(signal) -> int   (1-bit signals polled every cycle)
 
 FORBIDDEN patterns (cocotb 2.0 breaking changes):
   - dut.sig.value == 1           # LogicArray comparison fails
@@ -15,11 +16,31 @@ FORBIDDEN patterns (cocotb 2.0 breaking changes):
 REQUIRED patterns:
   - sig_to_int(dut.sig) == 1
   - sig_to_bool(dut.valid) is True
+
+X/Z handling: each helper reads signal.value once and lets LogicArray
+decide resolvability (to_unsigned() raising, or is_resolvable), so
+the common fully-driven case never builds or scans a string.
 """
 
 from cocotb.types import LogicArray
 
 
+def has_xz(bits: str) -> bool:
+    """
+    Check a binary string for X/Z digits.
+    
+    Tests both cases directly instead of lowercasing the string first,
+    so no copy is allocated per check.
+    
+    Args:
+        bits: Binary string representation of a signal or slice
+    
+    Returns:
+        bool: True if any digit is X or Z
+    """
+    return 'x' in bits or 'X' in bits or 'z' in bits or 'Z' in bits
+
+
 def sig_to_int(signal) -> int:
     """
     Convert a cocotb signal to integer.
@@ -27,6 +48,11 @@ def sig_to_int(signal) -> int:
     Handles LogicArray (cocotb 2.0) safely.
     Returns 0 if signal contains X or Z values.
     
+    LogicArray.to_unsigned() raises ValueError on X/Z by itself, so
+    no string is built and scanned per read. The exact type check
+    skips the isinstance MRO walk; subclasses take the int() path,
+    which raises the same way.
+    
     Args:
         signal: A cocotb signal handle (dut.signal_name)
     
@@ -35,13 +61,8 @@ def sig_to_int(signal) -> int:
     """
     try:
         val = signal.value
-        # Handle LogicArray with potential X/Z
-        if isinstance(val, LogicArray):
-            # Check for X/Z values
-            str_val = str(val)
-            if 'x' in str_val.lower() or 'z' in str_val.lower():
-                return 0
-            return int(val)
+        if type(val) is LogicArray:
+            return val.to_unsigned()
         return int(val)
     except (ValueError, TypeError):
         return 0
@@ -54,13 +75,43 @@ def sig_to_bool(signal) -> bool:
     Returns True if signal is non-zero.
     Returns False if signal is 0, X, or Z.
     
+    Does the conversion itself rather than calling sig_to_int, saving
+    a call frame per check; is_resolvable screens out X/Z.
+    
     Args:
         signal: A cocotb signal handle (dut.signal_name)
     
     Returns:
         bool: Boolean value of the signal
     """
-    return sig_to_int(signal) != 0
+    try:
+        val = signal.value
+        if type(val) is LogicArray:
+            return val.is_resolvable and val.to_unsigned() != 0
+        return int(val) != 0
+    except (ValueError, TypeError):
+        return False
+
+
+def sig_to_bit(signal) -> int:
+    """
+    Read a 1-bit signal as 0 or 1.
+    
+    For single-bit flags such as done or grant that are polled every
+    cycle. Like sig_to_int it raises no error on X/Z, but it keeps only
+    bit 0, so the result is always 0 or 1.
+    Returns 0 if the bit is X or Z.
+    
+    Args:
+        signal: A 1-bit cocotb signal handle (dut.signal_name)
+    
+    Returns:
+        int: 1 if the bit is driven high, else 0
+    """
+    try:
+        return int(signal.value) & 1
+    except (ValueError, TypeError):
+        return 0
 
 
 def sig_to_str(signal) -> str:
@@ -86,6 +137,11 @@ def sig_slice_to_int(signal, start: int, end: int) -> int:
     """
     Extract a bit slice from signal and convert to integer.
     
+    For an in-range slice of a fully resolved LogicArray the bits are
+    shifted and masked out of to_unsigned() without building a string.
+    If the signal holds X/Z anywhere, the string path decides, so only
+    X/Z inside the slice itself yields 0.
+    
     Args:
         signal: A cocotb signal handle
         start: Start bit (inclusive, 0-indexed from MSB in string)
@@ -95,9 +151,17 @@ def sig_slice_to_int(signal, start: int, end: int) -> int:
         int: Integer value of the slice
     """
     try:
-        str_val = str(signal.value)
+        val = signal.value
+        if type(val) is LogicArray:
+            width = len(val)
+            if 0 <= start < end <= width:
+                try:
+                    return (val.to_unsigned() >> (width - end)) & ((1 << (end - start)) - 1)
+                except ValueError:
+                    pass
+        str_val = str(val)
         slice_str = str_val[start:end]
-        if 'x' in slice_str.lower() or 'z' in slice_str.lower():
+        if has_xz(slice_str):
             return 0
         return int(slice_str, 2)
     except (ValueError, TypeError, IndexError):